@@ -0,0 +1,256 @@
+"""지역 × 카테고리 × 상품 조합을 UI 없이 일괄 검색하는 배치 스크립트
+
+CSV(location, category, product 열) 또는 JSONL 파일에서 검색 조합을 읽어
+여러 조합을 동시에 검색하고, 결과를 CSV 또는 Parquet 파일에 바로바로 기록합니다.
+모든 작업이 하나의 API 캐시, HTTP 연결 풀, 호출 제한/할당량 관리자를 공유하며,
+동시에 같은 요청을 보내는 작업은 하나의 실제 호출을 함께 사용합니다.
+
+사용 예:
+    export KAKAO_REST_API_KEY=... NAVER_CLIENT_ID=... NAVER_CLIENT_SECRET=...
+    python batch_sweep.py queries.csv -o results.csv --workers 8
+    python batch_sweep.py queries.jsonl -o results.parquet
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from product_finder_core import (
+    FETCH_FAILED_STATUS, QUOTA_DEFERRED_STATUS, HttpClient, LocalProductFinder, Metrics, RateLimiter, ResponseCache, SingleFlight
+)
+
+logger = logging.getLogger("batch_sweep")
+
+RESULT_FIELDS = [
+    "location", "category", "product", "rank",
+    "place_id", "place_name", "address_name", "road_address_name", "phone",
+    "category_name", "distance", "x", "y", "place_url",
+    "confidence", "status", "blog_count",
+]
+
+
+def read_queries(path):
+    """CSV 또는 JSONL 파일에서 (location, category, product) 조합을 하나씩 읽기"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+
+        for row in rows:
+            yield {
+                "location": row["location"].strip(),
+                "category": row["category"].strip(),
+                "product": row["product"].strip(),
+            }
+
+
+class CsvResultWriter:
+    """검색 결과를 CSV 파일에 한 조합씩 바로 기록"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """검색 결과를 Parquet 파일에 row group 단위로 기록 (pyarrow 필요)"""
+
+    def __init__(self, path, row_group_size=5000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet 출력에는 pyarrow가 필요합니다: pip install pyarrow")
+
+        self._pa = pa
+        self._schema = pa.schema([
+            (name, pa.float64() if name == "confidence" else pa.int64() if name in ("rank", "blog_count") else pa.string())
+            for name in RESULT_FIELDS
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._row_group_size = row_group_size
+        self._buffer = []
+
+    def write(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._writer.write_table(self._pa.Table.from_pylist(self._buffer, schema=self._schema))
+            self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_result_writer(path, output_format=None):
+    """출력 형식(csv/parquet)에 맞는 결과 기록기 생성"""
+    output_format = output_format or ("parquet" if path.endswith(".parquet") else "csv")
+    if output_format == "parquet":
+        return ParquetResultWriter(path)
+    return CsvResultWriter(path)
+
+
+def search_query(finder, query, max_places=15, verify_workers=1):
+    """조합 하나를 검색해 신뢰도순 결과 행 목록 반환
+
+    할당량이 떨어지거나 블로그 검색이 실패해 확인하지 못한 가게는 confidence를 비워 두고
+    status에 그 이유를 남깁니다.
+    """
+    places = finder.iter_places_kakao(query["location"], query["category"], max_results=max_places)
+    verified = finder.verify_places(places, query["product"], max_workers=verify_workers)
+    verified.sort(key=lambda x: x['confidence'], reverse=True)
+
+    return [
+        {
+            **query,
+            "rank": i + 1,
+            "place_id": place.get("id", ""),
+            "place_name": place["place_name"],
+            "address_name": place.get("address_name", ""),
+            "road_address_name": place.get("road_address_name", ""),
+            "phone": place.get("phone", ""),
+            "category_name": place.get("category_name", ""),
+            "distance": place.get("distance", ""),
+            "x": place.get("x", ""),
+            "y": place.get("y", ""),
+            "place_url": place.get("place_url", ""),
+            "confidence": (
+                None if place["status"] in (QUOTA_DEFERRED_STATUS, FETCH_FAILED_STATUS) else place["confidence"]
+            ),
+            "status": place["status"],
+            "blog_count": place["blog_count"],
+        }
+        for i, place in enumerate(verified)
+    ]
+
+
+def run_sweep(finder, queries, writer, workers=4, max_places=15, verify_workers=1, report_every=50):
+    """여러 조합을 동시에 검색해 결과를 writer에 기록하고 처리량 통계 반환
+
+    동시에 진행 중인 조합은 workers의 두 배를 넘지 않으므로 입력 파일 크기와
+    관계없이 메모리 사용량이 일정합니다. 네이버 할당량을 다 쓰거나 확인 보류된
+    가게가 나오면 새 조합을 멈춥니다.
+    """
+    started = time.perf_counter()
+    calls_before = sum(finder.http.calls.values())
+    query_count = 0
+    row_count = 0
+    deferred_count = 0
+
+    def report():
+        elapsed = time.perf_counter() - started
+        api_calls = sum(finder.http.calls.values()) - calls_before
+        stats = {
+            "queries": query_count,
+            "rows": row_count,
+            "deferred_rows": deferred_count,
+            "elapsed_seconds": round(elapsed, 3),
+            "queries_per_second": round(query_count / elapsed, 3) if elapsed else 0.0,
+            "api_calls": api_calls,
+            "api_calls_per_second": round(api_calls / elapsed, 3) if elapsed else 0.0,
+        }
+        if finder.cache is not None:
+            stats["cache_hit_ratio"] = round(finder.cache.stats()["hit_ratio"], 3)
+        return stats
+
+    def record(rows):
+        nonlocal query_count, row_count, deferred_count
+        writer.write(rows)
+        query_count += 1
+        row_count += len(rows)
+        deferred_count += sum(1 for row in rows if row["status"] == QUOTA_DEFERRED_STATUS)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for query in queries:
+            if finder.rate_limiter is not None and finder.rate_limiter.remaining("naver") == 0:
+                logger.warning("네이버 API 할당량을 모두 사용해 남은 조합을 건너뜁니다.")
+                break
+            if deferred_count:
+                logger.warning("할당량 부족으로 확인 보류된 가게가 있어 남은 조합을 건너뜁니다.")
+                break
+
+            pending.add(executor.submit(search_query, finder, query, max_places, verify_workers))
+            if len(pending) < workers * 2:
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(future.result())
+                if query_count % report_every == 0:
+                    logger.info("진행 상황: %s", json.dumps(report(), ensure_ascii=False))
+
+        for future in pending:
+            record(future.result())
+
+    return report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지역 × 카테고리 × 상품 조합 일괄 검색")
+    parser.add_argument("queries", help="검색 조합 파일 (.csv 또는 .jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="결과 파일 (.csv 또는 .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="출력 형식 (기본: 확장자로 판단)")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 검색할 조합 수")
+    parser.add_argument("--verify-workers", type=int, default=2, help="조합마다 동시에 확인할 가게 수")
+    parser.add_argument("--max-places", type=int, default=15, help="조합마다 확인할 최대 가게 수")
+    parser.add_argument("--kakao-key", default=os.environ.get("KAKAO_REST_API_KEY"))
+    parser.add_argument("--naver-id", default=os.environ.get("NAVER_CLIENT_ID"))
+    parser.add_argument("--naver-secret", default=os.environ.get("NAVER_CLIENT_SECRET"))
+    parser.add_argument("--metrics", help="종료 시 Prometheus 형식 계측값을 저장할 경로 (지정하면 계측 켜짐)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not args.kakao_key or not args.naver_id or not args.naver_secret:
+        parser.error("API 키가 필요합니다 (KAKAO_REST_API_KEY, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET)")
+
+    metrics = Metrics(enabled=bool(args.metrics))
+    finder = LocalProductFinder(
+        cache=ResponseCache(),
+        http=HttpClient(pool_size=max(args.workers * args.verify_workers, 10), metrics=metrics),
+        rate_limiter=RateLimiter(),
+        single_flight=SingleFlight(),
+        metrics=metrics
+    )
+    finder.setup_apis(args.kakao_key, args.naver_id, args.naver_secret)
+
+    writer = open_result_writer(args.output, args.format)
+    try:
+        stats = run_sweep(
+            finder,
+            read_queries(args.queries),
+            writer,
+            workers=args.workers,
+            max_places=args.max_places,
+            verify_workers=args.verify_workers
+        )
+    finally:
+        writer.close()
+
+    logger.info("완료: %s", json.dumps(stats, ensure_ascii=False))
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus(http=finder.http, cache=finder.cache, single_flight=finder.single_flight))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,473 @@
+"""검색 성능 측정 스크립트 (로컬 모의 API 서버 사용)
+
+mock_api_server의 모의 서버를 띄워 실제 API 할당량을 쓰지 않고 다음을 측정합니다.
+
+- end_to_end: 검색 1회(장소 검색 + 가게별 블로그 확인)의 지연 시간과 검색당 API 호출 수
+- cached_repeat: 같은 검색을 반복할 때의 지연 시간 (응답 캐시 효과)
+- scoring: calculate_confidence / calculate_confidence_batch 처리량 (가게/초)
+- concurrent_sessions: N개 세션이 동시에 같은 검색을 할 때의 지연 시간과 실제 호출 수
+- text_matching: TextMatcher 신뢰도 계산 처리량 (상품 1개/여러 개)과 표기 변형 글의 언급 인식률
+- adaptive_evidence: 블로그 글 고정 10개 / 적응형 / 예산 전부 사용의 신뢰도 등급 정확도와 가게당 호출 수
+- viewport_search: 지도 이동(처음 영역 → 옆으로 이동 → 되돌아오기)마다의 장소 검색 호출 수와
+  공간 인덱스의 가까운 N곳/반경 질의 시간 (전체 탐색 대비)
+- superseded_search: 검색 도중 같은 세션에서 새 검색을 시작할 때 이전 검색이 더 쓰는 네이버 호출 수와
+  멈추기까지의 시간 (취소하지 않고 끝까지 진행하는 경우 대비)
+- result_memory: 세션 N개가 보관하는 검색 결과 메모리 (dict 목록 대비 PlaceResult)
+- cold_start: 새 프로세스에서 핵심 모듈과 Streamlit 앱 모듈을 import하는 시간
+
+결과는 표로 출력하고 --output으로 JSON 저장, --compare로 이전 결과와 비교합니다.
+
+사용 예:
+    python benchmark.py --output bench_before.json
+    python benchmark.py --compare bench_before.json --latency-ms 120
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import unicodedata
+from datetime import datetime
+
+from mock_api_server import MockApiServer
+from product_finder_core import (
+    HttpClient, JobRegistry, LocalProductFinder, ResponseCache, SearchCancelled, SingleFlight, SpatialIndex,
+    TextMatcher, compact_results,
+    distance_m, normalize_text, product_aliases, store_aliases,
+)
+
+# 값이 작을수록 좋은 지표의 이름 접미사 (비교 표시용)
+LOWER_IS_BETTER = ("_ms", "calls_per_search", "upstream_calls", "_kb_per_session", "_calls_per_store", "_kakao_calls", "_naver_calls")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round((len(values) - 1) * q / 100)))
+    return values[index]
+
+
+def latency_summary(prefix, seconds):
+    """지연 시간 목록을 p50/p95/p99 (ms) 지표로 변환"""
+    ms = [s * 1000 for s in seconds]
+    return {
+        f"{prefix}_p50_ms": round(percentile(ms, 50), 2),
+        f"{prefix}_p95_ms": round(percentile(ms, 95), 2),
+        f"{prefix}_p99_ms": round(percentile(ms, 99), 2),
+        f"{prefix}_mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+    }
+
+
+class Bench:
+    def __init__(self, server, workdir, max_workers):
+        self.server = server
+        self.workdir = workdir
+        self.max_workers = max_workers
+        self._db_count = 0
+
+    def new_cache(self):
+        self._db_count += 1
+        return ResponseCache(path=os.path.join(self.workdir, f"cache_{self._db_count}.sqlite3"))
+
+    def finder(self, cache=None, http=None, single_flight=None, cancel_event=None):
+        finder = LocalProductFinder(
+            cache=cache,
+            http=http or HttpClient(),
+            single_flight=single_flight,
+            kakao_base_url=self.server.base_url,
+            naver_base_url=self.server.base_url,
+            cancel_event=cancel_event,
+        )
+        finder.setup_apis("bench-kakao", "bench-naver-id", "bench-naver-secret")
+        return finder
+
+    def search(self, finder, location, category="떡집", product="시루떡", max_places=15, max_workers=None):
+        places = finder.iter_places_kakao(location, category, max_results=max_places)
+        results = finder.verify_places(places, product, max_workers=max_workers or self.max_workers)
+        results.sort(key=lambda x: x['confidence'], reverse=True)
+        return results
+
+    def end_to_end(self, searches):
+        """캐시 없이 서로 다른 검색 searches회"""
+        finder = self.finder()
+        self.server.reset_counters()
+        latencies = []
+        for n in range(searches):
+            start = time.perf_counter()
+            self.search(finder, f"벤치동{n}")
+            latencies.append(time.perf_counter() - start)
+        calls = sum(self.server.requests.values())
+        return {
+            **latency_summary("search", latencies),
+            "calls_per_search": round(calls / searches, 2),
+        }
+
+    def cached_repeat(self, repeats):
+        """같은 검색을 repeats회 반복 (첫 회 이후는 캐시 적중)"""
+        finder = self.finder(cache=self.new_cache())
+        self.search(finder, "캐시동")
+        self.server.reset_counters()
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            self.search(finder, "캐시동")
+            latencies.append(time.perf_counter() - start)
+        return {
+            **latency_summary("cached_search", latencies),
+            "upstream_calls": sum(self.server.requests.values()),
+        }
+
+    def scoring(self, stores, items_per_store=10):
+        """모의 블로그 응답으로 신뢰도 계산 처리량 측정"""
+        from mock_api_server import search_blogs
+
+        batch = []
+        for n in range(stores):
+            store_name = f"벤치가게{n} 본점"
+            product = random.Random(n).choice(["시루떡", "인절미", "송편"])
+            batch.append((search_blogs(f"{store_name} {product}", 1, items_per_store), store_name, product))
+
+        finder = LocalProductFinder()
+        start = time.perf_counter()
+        for blog_data, store_name, product in batch:
+            finder.calculate_confidence(blog_data, store_name, product)
+        scalar = time.perf_counter() - start
+
+        finder.calculate_confidence_batch(batch[:1])  # pandas/numpy 첫 import는 측정에서 제외
+        start = time.perf_counter()
+        finder.calculate_confidence_batch(batch)
+        batched = time.perf_counter() - start
+
+        return {
+            "scalar_stores_per_second": round(stores / scalar, 1),
+            "batch_stores_per_second": round(stores / batched, 1),
+        }
+
+    def text_matching(self, stores, items_per_store=50):
+        """TextMatcher 처리량과 띄어쓰기/태그/엔티티/별칭/지점 표기 변형 글의 언급 인식률"""
+        from mock_api_server import search_blogs
+
+        finder = LocalProductFinder()
+        results = {}
+
+        # 상품 1개: 가게마다 다른 응답 / 여러 상품: 가게 응답 하나를 상품 3개가 함께 사용
+        single = []
+        for n in range(stores):
+            store_name = f"벤치가게{n} 본점"
+            product = random.Random(n).choice(["시루떡", "인절미", "송편"])
+            single.append((search_blogs(f"{store_name} {product}", 1, 10), store_name, product))
+        multi = []
+        for n in range(stores // 5):
+            store_name = f"벤치가게{n}"
+            blog_data = search_blogs(store_name, 1, items_per_store)
+            multi.extend((blog_data, store_name, product) for product in ("시루떡", "인절미", "송편"))
+
+        for name, batch in (("single", single), ("multi", multi)):
+            start = time.perf_counter()
+            for blog_data, store_name, product in batch:
+                finder.calculate_confidence(blog_data, store_name, product)
+            scalar = time.perf_counter() - start
+
+            start = time.perf_counter()
+            finder.calculate_confidence_matched(batch)
+            matched = time.perf_counter() - start
+
+            results[f"{name}_scalar_scores_per_second"] = round(len(batch) / scalar, 1)
+            results[f"{name}_matched_scores_per_second"] = round(len(batch) / matched, 1)
+
+        # 모든 글이 상품과 가게를 실제로 언급하지만 표기가 조금씩 다른 경우
+        def variants(store_name, product):
+            base = store_aliases(store_name)[-1]
+            spaced = " ".join(product)
+            entity = product[:-1] + f"&#{ord(product[-1])};"
+            synonym = product_aliases(product)[-1]
+            return [
+                (f"{base} 다녀왔어요", f"{spaced} 샀어요"),
+                (f"<b>{store_name}</b> 후기", f"<b>{product[:1]}</b>{product[1:]} 맛집"),
+                (f"{store_name} 방문", f"{entity} 추천"),
+                (f"{base.replace('가게', '가게 ')} 단골", f"{synonym} 최고"),
+                (unicodedata.normalize("NFD", f"{store_name} {product}"), "설 선물"),
+            ]
+
+        one_year_ago = datetime.now()  # 게시일이 없어 인식률과 무관
+        baseline_hits = matched_hits = mentions = 0
+        for n in range(stores // 5):
+            store_name = f"벤치가게{n} 본점"
+            product = ["배추김치", "모싯잎송편", "인절미"][n % 3]
+            matcher = TextMatcher({"store": store_aliases(store_name), "product": product_aliases(product)})
+            for title, description in variants(store_name, product):
+                item = {"title": title, "description": description, "postdate": ""}
+                product_hit, store_hit, _ = finder._item_evidence(item, store_name, product, one_year_ago)
+                found = matcher.find(normalize_text(title + "\0" + description))
+                baseline_hits += product_hit + store_hit
+                matched_hits += ("product" in found) + ("store" in found)
+                mentions += 2
+
+        results["baseline_recall"] = round(baseline_hits / mentions, 3)
+        results["matched_recall"] = round(matched_hits / mentions, 3)
+        return results
+
+    def concurrent_sessions(self, sessions):
+        """sessions개 세션이 동시에 같은 검색 (캐시/연결 풀/single-flight 공유)"""
+        cache = self.new_cache()
+        http = HttpClient()
+        single_flight = SingleFlight()
+        self.server.reset_counters()
+
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(sessions)
+
+        def session():
+            finder = self.finder(cache=cache, http=http, single_flight=single_flight)
+            barrier.wait()
+            start = time.perf_counter()
+            self.search(finder, "동시동")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=session) for _ in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            **latency_summary("session", latencies),
+            "upstream_calls": sum(self.server.requests.values()),
+            "coalesced_calls": sum(single_flight.stats()["coalesced"].values()),
+        }
+
+
+    def adaptive_evidence(self, stores, truth_items=100):
+        """글 truth_items개로 계산한 등급을 정답으로, 고정/적응형 확인의 정확도와 호출 수 비교"""
+        from mock_api_server import search_blogs
+
+        finder = self.finder()
+        products = ["시루떡", "인절미", "송편"]
+        cases = [(f"벤치가게{n} 본점", products[n % len(products)]) for n in range(stores)]
+        truth = [
+            finder.scoring.level(finder.calculate_confidence(
+                search_blogs(f"{store} {product}", 1, truth_items), store, product
+            )[0])
+            for store, product in cases
+        ]
+
+        results = {}
+        for name, fetch in (
+            ("fixed", lambda store, product: finder.search_blogs_naver(store, product)),
+            ("adaptive", lambda store, product: finder.search_blogs_adaptive(store, product)),
+            # 같은 글 예산을 항상 다 쓰는 경우 (구간이 절대 좁혀지지 않음)
+            ("full_budget", lambda store, product: finder.search_blogs_adaptive(store, product, z=float("inf"))),
+        ):
+            self.server.reset_counters()
+            correct = 0
+            for (store, product), expected in zip(cases, truth):
+                confidence, _ = finder.calculate_confidence(fetch(store, product), store, product)
+                correct += finder.scoring.level(confidence) == expected
+            results[f"{name}_accuracy"] = round(correct / stores, 3)
+            results[f"{name}_calls_per_store"] = round(sum(self.server.requests.values()) / stores, 2)
+        return results
+
+    def viewport_search(self, places=100000, queries=200):
+        """지도 영역 검색의 이동별 호출 수와 공간 인덱스 질의 시간"""
+        finder = self.finder()
+        index = SpatialIndex()
+        results = {}
+        for name, bounds in (
+            ("first_view", (37.50, 127.00, 37.54, 127.06)),
+            ("pan_east", (37.50, 127.03, 37.54, 127.09)),
+            ("pan_back", (37.50, 127.00, 37.54, 127.06)),
+        ):
+            self.server.reset_counters()
+            finder.search_viewport("떡집", bounds, index, max_results=45)
+            results[f"{name}_kakao_calls"] = self.server.requests.get("kakao", 0)
+
+        # 서울 범위에 흩어진 가상의 장소로 질의 시간 비교
+        rnd = random.Random(0)
+        index = SpatialIndex()
+        points = [
+            {"id": str(n), "y": f"{37.45 + rnd.random() * 0.2:.7f}", "x": f"{126.85 + rnd.random() * 0.3:.7f}"}
+            for n in range(places)
+        ]
+        index.add(points)
+        centers = [(37.45 + rnd.random() * 0.2, 126.85 + rnd.random() * 0.3) for _ in range(queries)]
+
+        start = time.perf_counter()
+        indexed_answers = [
+            ([p["id"] for _, p in index.nearest(lat, lng, 15)], {p["id"] for _, p in index.within_radius(lat, lng, 500)})
+            for lat, lng in centers
+        ]
+        indexed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        linear_answers = []
+        for lat, lng in centers:
+            distances = sorted((distance_m(lat, lng, float(p["y"]), float(p["x"])), p["id"]) for p in points)
+            linear_answers.append(([i for _, i in distances[:15]], {i for d, i in distances if d <= 500}))
+        linear = time.perf_counter() - start
+
+        results["index_matches_linear"] = round(
+            sum(a == b for a, b in zip(indexed_answers, linear_answers)) / queries, 3
+        )
+        results["index_query_ms"] = round(indexed / queries * 1000, 3)
+        results["linear_query_ms"] = round(linear / queries * 1000, 3)
+        return results
+
+    def superseded_search(self, max_places=45, supersede_after=0.2):
+        """검색 시작 supersede_after초 뒤 같은 세션에서 새 검색을 시작했을 때 이전 검색의 비용"""
+        results = {}
+        for name, cancel in (("uncancelled", False), ("cancelled", True)):
+            registry = JobRegistry()
+            job = registry.start("bench-session")
+            finder = self.finder(cache=self.new_cache(), cancel_event=job.cancel_event if cancel else None)
+            places = list(finder.iter_places_kakao("취소동", "떡집", max_results=max_places))
+
+            self.server.reset_counters()
+            timer = threading.Timer(supersede_after, registry.start, args=("bench-session",))
+            timer.start()
+            start = time.perf_counter()
+            try:
+                finder.verify_places(places, "시루떡", max_workers=self.max_workers)
+            except SearchCancelled:
+                pass
+            timer.join()
+            results[f"{name}_naver_calls"] = self.server.requests.get("naver", 0)
+            results[f"{name}_stop_ms"] = round((time.perf_counter() - start - supersede_after) * 1000, 1)
+            results[f"{name}_cached_responses"] = finder.cache.stats()["entries"]
+        return results
+
+    def result_memory(self, sessions, places_per_session=45):
+        """세션마다 서로 다른 검색 결과를 보관할 때의 메모리 (tracemalloc 기준)"""
+        from mock_api_server import search_places
+
+        def session_results(n):
+            # 세션마다 API 응답을 따로 JSON 디코딩하므로 문자열도 각각 따로 생김
+            places = json.loads(json.dumps(search_places(f"메모리동{n} 떡집")[:places_per_session]))
+            for i, place in enumerate(places):
+                confidence = (i % 10) / 10
+                place["confidence"] = confidence
+                place["status"] = "✅ 시루떡 판매 확실" if confidence >= 0.7 else "❓ 시루떡 판매 불확실"
+                place["blog_count"] = i % 11
+            return places
+
+        def measure(build):
+            tracemalloc.start()
+            stored = [build(n) for n in range(sessions)]
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del stored
+            return size
+
+        dict_bytes = measure(session_results)
+        compact_bytes = measure(lambda n: compact_results(session_results(n)))
+        return {
+            "dict_kb_per_session": round(dict_bytes / sessions / 1024, 1),
+            "compact_kb_per_session": round(compact_bytes / sessions / 1024, 1),
+        }
+
+    def cold_start(self, repeats):
+        """새 파이썬 프로세스에서 모듈 import 시간 (repeats회 중 중앙값)"""
+        script = (
+            "import time; start = time.perf_counter(); import {module}; "
+            "print(time.perf_counter() - start)"
+        )
+        results = {}
+        for name, module in (("core", "product_finder_core"), ("app", "streamlit_product_finder")):
+            seconds = [
+                float(subprocess.run(
+                    [sys.executable, "-c", script.format(module=module)],
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    capture_output=True, text=True, check=True,
+                ).stdout)
+                for _ in range(repeats)
+            ]
+            results[f"{name}_import_ms"] = round(statistics.median(seconds) * 1000, 2)
+        return results
+
+
+def run_benchmarks(args):
+    with tempfile.TemporaryDirectory() as workdir, MockApiServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=0,
+    ) as server:
+        bench = Bench(server, workdir, args.max_workers)
+        report = {
+            "config": {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "error_rate": args.error_rate,
+                "rate_limit_rate": args.rate_limit_rate,
+                "max_workers": args.max_workers,
+            },
+            "results": {},
+        }
+        results = report["results"]
+        results["end_to_end"] = bench.end_to_end(args.searches)
+        results["cached_repeat"] = bench.cached_repeat(args.searches)
+        results["scoring"] = bench.scoring(args.score_stores)
+        results["concurrent_sessions"] = bench.concurrent_sessions(args.sessions)
+        results["text_matching"] = bench.text_matching(args.score_stores)
+        results["adaptive_evidence"] = bench.adaptive_evidence(args.evidence_stores)
+        results["viewport_search"] = bench.viewport_search()
+        results["superseded_search"] = bench.superseded_search()
+        results["result_memory"] = bench.result_memory(args.sessions)
+        results["cold_start"] = bench.cold_start(args.import_repeats)
+        return report
+
+
+def print_report(report, baseline=None):
+    """결과 표 출력 (baseline이 있으면 변화율도 표시)"""
+    print(f"설정: {json.dumps(report['config'], ensure_ascii=False)}")
+    for scenario, metrics in report["results"].items():
+        print(f"\n[{scenario}]")
+        for name, value in metrics.items():
+            line = f"  {name:<28} {value:>12}"
+            old = (baseline or {}).get("results", {}).get(scenario, {}).get(name)
+            if old:
+                change = (value - old) / old * 100
+                better = change < 0 if name.endswith(LOWER_IS_BETTER) else change > 0
+                mark = "개선" if better else "악화" if change else "동일"
+                line += f"   (이전 {old}, {change:+.1f}% {mark})"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지역 특산품 찾기 검색 성능 측정")
+    parser.add_argument("--searches", type=int, default=10, help="end_to_end/cached_repeat 검색 횟수")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 세션 수")
+    parser.add_argument("--score-stores", type=int, default=5000, help="신뢰도 계산 처리량 측정 가게 수")
+    parser.add_argument("--evidence-stores", type=int, default=200, help="adaptive_evidence 비교 가게 수")
+    parser.add_argument("--import-repeats", type=int, default=5, help="cold_start import 측정 횟수")
+    parser.add_argument("--max-workers", type=int, default=5, help="가게 확인 동시 실행 수")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""카카오 로컬 / 네이버 블로그 검색 API를 흉내 내는 로컬 모의 서버
+
+실제 API와 같은 경로와 응답 형식(documents/meta, items/total)을 돌려주며, 같은
+요청에는 항상 같은 결과를 냅니다. 응답 지연, 5xx 오류, 429(호출 제한) 비율을
+지정할 수 있어 성능 측정과 회귀 테스트에 사용합니다.
+
+사용 예:
+    python mock_api_server.py --port 8085 --latency-ms 80 --jitter-ms 30 --rate-limit-rate 0.02
+    KAKAO_API_BASE_URL=http://127.0.0.1:8085 NAVER_API_BASE_URL=http://127.0.0.1:8085 \\
+        streamlit run streamlit_product_finder.py
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 가상의 가게가 놓이는 격자 (약 500m 칸, 칸마다 0~2곳)
+CELL_SIZE = 0.005
+SEOUL_BOUNDS = (37.45, 126.85, 37.65, 127.15)  # (남, 서, 북, 동)
+AREA_RADIUS_CELLS = 4  # "지역 카테고리" 검색 시 지역 중심에서 찾는 범위
+
+NAME_PREFIXES = ["할매", "옛날", "전통", "소문난", "원조", "행복", "정성", "우리", "명품", "새벽"]
+BRANCHES = ["본점", "강남점", "역삼점", "홍대점", "신촌점", "시장점", "2호점", ""]
+BLOG_FILLERS = ["후기", "맛집", "추천", "방문기", "솔직 리뷰", "내돈내산", "동네", "단골", "주말 나들이"]
+
+
+def _seed(*parts):
+    """문자열들로 결정적인 난수 시드 생성"""
+    return int(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _haversine_m(lat1, lng1, lat2, lng2):
+    """두 좌표 사이 거리 (m)"""
+    r = 6371000
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
+def places_in_cell(category, ix, iy):
+    """격자 한 칸에 있는 가상의 가게 목록 (카테고리와 칸이 같으면 항상 같은 결과)"""
+    rnd = random.Random(_seed("cell", category, ix, iy))
+    places = []
+    for n in range(rnd.choice([0, 0, 1, 1, 2])):
+        place_id = str(10000000 + _seed("id", category, ix, iy, n) % 90000000)
+        lat = (iy + rnd.random()) * CELL_SIZE
+        lng = (ix + rnd.random()) * CELL_SIZE
+        name = f"{rnd.choice(NAME_PREFIXES)}{category} {rnd.choice(BRANCHES)}".strip()
+        places.append({
+            "id": place_id,
+            "place_name": name,
+            "category_name": f"음식점 > 간식 > {category}",
+            "category_group_code": "FD6",
+            "category_group_name": "음식점",
+            "phone": f"02-{rnd.randint(200, 999)}-{rnd.randint(1000, 9999)}",
+            "address_name": f"서울 가상구 가상동 {rnd.randint(1, 999)}-{rnd.randint(1, 99)}",
+            "road_address_name": f"서울 가상구 가상로{rnd.randint(1, 99)}길 {rnd.randint(1, 99)}",
+            "x": f"{lng:.7f}",
+            "y": f"{lat:.7f}",
+            "place_url": f"http://place.map.kakao.com/{place_id}",
+            "distance": "",
+        })
+    return places
+
+
+def area_center(location):
+    """지역 이름을 서울 안의 한 좌표로 대응"""
+    rnd = random.Random(_seed("area", location))
+    south, west, north, east = SEOUL_BOUNDS
+    return south + rnd.random() * (north - south), west + rnd.random() * (east - west)
+
+
+def search_places(query, x=None, y=None, radius=None, rect=None):
+    """카카오 키워드 검색 결과 전체 (페이지 나누기 전)"""
+    tokens = query.split()
+    category = tokens[-1] if tokens else ""
+
+    if rect:
+        left, bottom, right, top = (float(v) for v in rect.split(","))
+        cells = [
+            (ix, iy)
+            for ix in range(math.floor(left / CELL_SIZE), math.floor(right / CELL_SIZE) + 1)
+            for iy in range(math.floor(bottom / CELL_SIZE), math.floor(top / CELL_SIZE) + 1)
+        ]
+        places = [
+            p for cell in cells for p in places_in_cell(category, *cell)
+            if left <= float(p["x"]) <= right and bottom <= float(p["y"]) <= top
+        ]
+    else:
+        if x is not None and y is not None:
+            center_lat, center_lng = float(y), float(x)
+        else:
+            center_lat, center_lng = area_center(" ".join(tokens[:-1]))
+        cx, cy = math.floor(center_lng / CELL_SIZE), math.floor(center_lat / CELL_SIZE)
+        places = [
+            p
+            for ix in range(cx - AREA_RADIUS_CELLS, cx + AREA_RADIUS_CELLS + 1)
+            for iy in range(cy - AREA_RADIUS_CELLS, cy + AREA_RADIUS_CELLS + 1)
+            for p in places_in_cell(category, ix, iy)
+        ]
+        for p in places:
+            d = _haversine_m(center_lat, center_lng, float(p["y"]), float(p["x"]))
+            p["_d"] = d
+            if x is not None and y is not None:
+                p["distance"] = str(int(d))
+        if radius is not None:
+            places = [p for p in places if p["_d"] <= float(radius)]
+        places.sort(key=lambda p: p["_d"])
+        for p in places:
+            del p["_d"]
+    return places
+
+
+def search_blogs(query, start, display):
+    """네이버 블로그 검색 결과 (가게/상품마다 언급 빈도와 최신성이 다름)"""
+    rnd = random.Random(_seed("blog", query))
+    popularity = rnd.random()
+    total = int(popularity * 300)
+    mention_rate = 0.2 + 0.75 * rnd.random()
+    freshness = rnd.random()
+    terms = query.split()
+
+    items = []
+    today = datetime(2026, 1, 1)
+    for n in range(start - 1, min(total, start - 1 + display)):
+        item_rnd = random.Random(_seed("item", query, n))
+        if item_rnd.random() < mention_rate:
+            words = [f"<b>{t}</b>" for t in terms]
+        else:
+            words = [f"<b>{terms[0]}</b>"] if terms and item_rnd.random() < 0.5 else []
+        words.append(item_rnd.choice(BLOG_FILLERS))
+        age_days = int(item_rnd.expovariate(1 / (60 + 900 * (1 - freshness))))
+        items.append({
+            "title": " ".join(words),
+            "link": f"https://blog.naver.com/mock/{_seed('post', query, n) % 10 ** 12}",
+            "description": f"{' '.join(words)} {item_rnd.choice(BLOG_FILLERS)} 다녀왔어요. 가격도 괜찮고 친절했어요.",
+            "bloggername": f"블로거{item_rnd.randint(1, 9999)}",
+            "bloggerlink": "blog.naver.com/mock",
+            "postdate": (today - timedelta(days=age_days)).strftime("%Y%m%d"),
+        })
+    items.sort(key=lambda item: item["postdate"], reverse=True)
+    return {
+        "lastBuildDate": "Thu, 01 Jan 2026 00:00:00 +0900",
+        "total": total,
+        "start": start,
+        "display": len(items),
+        "items": items,
+    }
+
+
+class MockApiServer:
+    """백그라운드 스레드에서 실행하는 모의 API 서버
+
+    latency_ms/jitter_ms: 응답 지연 평균/표준편차
+    error_rate: 500 응답 비율, rate_limit_rate: 429 응답 비율
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests = Counter()
+        self.statuses = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.statuses.clear()
+
+    def _draw(self):
+        """(지연 초, 실패 종류) 결정"""
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+    def _record(self, endpoint, status):
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.statuses[status] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+                if parsed.path == "/v2/local/search/keyword.json":
+                    endpoint = "kakao"
+                    authorized = self.headers.get("Authorization", "").startswith("KakaoAK ")
+                elif parsed.path == "/v1/search/blog.json":
+                    endpoint = "naver"
+                    authorized = bool(self.headers.get("X-Naver-Client-Id") and self.headers.get("X-Naver-Client-Secret"))
+                else:
+                    server._record("unknown", 404)
+                    return self._send_json(404, {"errorMessage": "Not Found"})
+
+                delay, failure = server._draw()
+                if delay:
+                    time.sleep(delay)
+
+                if not authorized:
+                    server._record(endpoint, 401)
+                    return self._send_json(401, {"errorType": "AccessDeniedError", "message": "인증 정보가 없습니다."})
+                if failure == 429:
+                    server._record(endpoint, 429)
+                    return self._send_json(429, {"errorMessage": "Rate limit exceeded"}, {"Retry-After": "0"})
+                if failure == 500:
+                    server._record(endpoint, 500)
+                    return self._send_json(500, {"errorMessage": "Internal Server Error"})
+
+                server._record(endpoint, 200)
+                if endpoint == "kakao":
+                    self._send_json(200, self._kakao(params))
+                else:
+                    self._send_json(200, self._naver(params))
+
+            def _kakao(self, params):
+                size = min(max(int(params.get("size", 15)), 1), 15)
+                page = min(max(int(params.get("page", 1)), 1), 45)
+                places = search_places(
+                    params.get("query", ""),
+                    x=params.get("x"), y=params.get("y"),
+                    radius=params.get("radius"), rect=params.get("rect"),
+                )
+                pageable = places[:45]
+                documents = pageable[(page - 1) * size: page * size]
+                return {
+                    "documents": documents,
+                    "meta": {
+                        "total_count": len(places),
+                        "pageable_count": len(pageable),
+                        "is_end": page * size >= len(pageable),
+                        "same_name": None,
+                    },
+                }
+
+            def _naver(self, params):
+                display = min(max(int(params.get("display", 10)), 1), 100)
+                start = min(max(int(params.get("start", 1)), 1), 1000)
+                return search_blogs(params.get("query", ""), start, display)
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="카카오/네이버 검색 API 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency-ms", type=float, default=50, help="평균 응답 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="응답 지연 표준편차 (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율 (0~1)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 응답 비율 (0~1)")
+    args = parser.parse_args(argv)
+
+    server = MockApiServer(
+        host=args.host, port=args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+    )
+    print(f"모의 API 서버 실행 중: {server.base_url} (Ctrl+C로 종료)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2373 @@
+"""지역 특산품 찾기 검색/신뢰도 계산 핵심 모듈
+
+Streamlit 없이 가져다 쓸 수 있도록 API 호출, 캐시, 호출 제한, 신뢰도 계산,
+미리 검색 기능만 담습니다. pandas/numpy(일괄 신뢰도 계산)와 folium(지도 생성)은
+해당 기능을 처음 쓸 때 불러옵니다.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+import json
+import math
+import time
+import random
+import logging
+import contextlib
+import copy
+import re
+import os
+import hashlib
+import heapq
+import html
+import sqlite3
+import sys
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import urllib.parse
+import uuid
+
+try:
+    import ahocorasick  # 선택 사항 (pip install pyahocorasick) - 없으면 검색어마다 확인
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+# API 응답 캐시 설정
+CACHE_DB_PATH = os.environ.get("PRODUCT_FINDER_CACHE_DB", os.path.join(".cache", "api_cache.sqlite3"))
+CACHE_TTLS = {
+    "kakao": 7 * 24 * 60 * 60,  # 가게 목록은 자주 바뀌지 않음 (7일)
+    "naver": 24 * 60 * 60,      # 블로그 검색 결과 (1일)
+}
+CACHE_MAX_ENTRIES = 20000
+# 적중 시 LRU 사용 시각을 모아서 기록하는 간격(초)과 최대 개수
+CACHE_TOUCH_INTERVAL = 30
+CACHE_TOUCH_BATCH = 200
+
+
+class ResponseCache:
+    """SQLite 기반 API 응답 캐시 (API별 TTL + LRU 제거)
+    
+    정규화된 요청(URL + 파라미터)을 키로 응답 본문을 저장하므로 프로세스를
+    재시작해도 유지되며, 같은 프로세스의 여러 세션과 스레드가 함께 사용할 수 있습니다.
+    적중할 때마다 쓰지 않도록 LRU 사용 시각은 메모리에 모았다가 touch_interval초 또는
+    touch_batch개마다 한 트랜잭션으로 기록하고, 항목 수는 세어 두었다가 stats()에서 맞춥니다.
+    """
+    
+    def __init__(self, path=CACHE_DB_PATH, ttls=None, max_entries=CACHE_MAX_ENTRIES,
+                 touch_interval=CACHE_TOUCH_INTERVAL, touch_batch=CACHE_TOUCH_BATCH):
+        self.path = path
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.touch_batch = touch_batch
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> 아직 기록하지 않은 마지막 사용 시각
+        self._last_flush = time.monotonic()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL이어도 DB가 깨지지 않음 (전원이 꺼지면 마지막 몇 건만 잃을 수 있는 캐시)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS api_cache (
+                key TEXT PRIMARY KEY,
+                api TEXT NOT NULL,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_accessed ON api_cache (accessed_at)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM api_cache").fetchone()[0]
+    
+    @staticmethod
+    def make_key(url, params):
+        """요청 정규화: 파라미터 정렬, 검색어 공백 정리 및 소문자화"""
+        normalized = []
+        for name, value in sorted(params.items()):
+            if isinstance(value, str):
+                value = " ".join(value.split()).lower()
+            normalized.append((name, value))
+        return f"{url}?{urllib.parse.urlencode(normalized)}"
+    
+    def get(self, api, url, params):
+        """캐시된 응답 본문 반환 (없거나 만료되면 None)"""
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, created_at FROM api_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttls.get(api, 0):
+                self.misses[api] += 1
+                return None
+            self._touched[key] = now
+            if (len(self._touched) >= self.touch_batch
+                    or time.monotonic() - self._last_flush >= self.touch_interval):
+                self._flush_touches()
+            self.hits[api] += 1
+            return row[0]
+    
+    def set(self, api, url, params, body):
+        """응답 본문 저장 후 최대 개수를 넘으면 오래 사용되지 않은 항목부터 제거"""
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM api_cache WHERE key = ?", (key,)).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO api_cache (key, api, body, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, api, body, now, now)
+            )
+            self._touched.pop(key, None)
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                # 제거 순서가 최근 사용을 반영하도록 모아 둔 사용 시각부터 기록
+                self._flush_touches()
+                self._conn.execute(
+                    "DELETE FROM api_cache WHERE key IN "
+                    "(SELECT key FROM api_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (self._count - self.max_entries,)
+                )
+                self._count = self._conn.execute("SELECT COUNT(*) FROM api_cache").fetchone()[0]
+    
+    def flush(self):
+        """모아 둔 LRU 사용 시각을 바로 기록"""
+        with self._lock:
+            self._flush_touches()
+    
+    def _flush_touches(self):
+        if self._touched:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "UPDATE api_cache SET accessed_at = ? WHERE key = ?",
+                    [(accessed_at, key) for key, accessed_at in self._touched.items()]
+                )
+            self._touched.clear()
+        self._last_flush = time.monotonic()
+    
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM api_cache")
+            self._touched.clear()
+            self._count = 0
+    
+    def stats(self):
+        """API별 적중/미스 횟수와 저장된 항목 수"""
+        with self._lock:
+            # 다른 프로세스가 같은 파일에 쓴 항목도 반영되도록 여기서 개수를 다시 맞춤
+            entries = self._count = self._conn.execute("SELECT COUNT(*) FROM api_cache").fetchone()[0]
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                "entries": entries,
+            }
+
+
+# API 호출 제한 (일일 한도는 README의 무료 사용량 기준)
+RATE_LIMITS = {"kakao": 20.0, "naver": 10.0}  # 초당 요청 수
+DAILY_QUOTAS = {"kakao": 300000, "naver": 25000}
+QUOTA_DB_PATH = os.environ.get("PRODUCT_FINDER_QUOTA_DB", os.path.join(".cache", "api_quota.sqlite3"))
+KST = timezone(timedelta(hours=9))  # 일일 할당량은 한국 시간 자정에 초기화
+
+
+class QuotaExceededError(requests.RequestException):
+    """오늘의 API 할당량을 모두 사용함"""
+
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷 (여러 스레드에서 공유 가능)"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """토큰 하나를 예약하고, 부족하면 채워질 때까지 대기"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait_seconds = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+    
+    def try_acquire(self):
+        """토큰이 바로 있으면 하나 쓰고 True, 없으면 기다리지 않고 False"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RateLimiter:
+    """API별 토큰 버킷과 SQLite에 기록하는 일일 할당량
+    
+    프로세스 안의 모든 스레드/세션이 하나의 인스턴스를 공유하며, 사용량은 파일에
+    기록되므로 재시작하거나 여러 프로세스가 같은 파일을 써도 함께 집계됩니다.
+    """
+    
+    def __init__(self, rates=RATE_LIMITS, quotas=DAILY_QUOTAS, path=QUOTA_DB_PATH):
+        self.quotas = dict(quotas)
+        self._buckets = {api: TokenBucket(rate) for api, rate in rates.items()}
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS api_quota (
+                day TEXT NOT NULL,
+                api TEXT NOT NULL,
+                used INTEGER NOT NULL,
+                PRIMARY KEY (day, api)
+            )
+        """)
+    
+    @staticmethod
+    def _today():
+        return datetime.now(KST).strftime('%Y%m%d')
+    
+    def acquire(self, api):
+        """할당량을 1회 차감하고 호출 속도 제한에 맞춰 대기 (할당량이 없으면 QuotaExceededError)"""
+        self._consume(api)
+        bucket = self._buckets.get(api)
+        if bucket is not None:
+            bucket.acquire()
+    
+    def try_acquire(self, api):
+        """기다리지 않고 보낼 수 있을 때만 할당량을 차감하고 True (호출 속도 제한에 걸리면 False)"""
+        bucket = self._buckets.get(api)
+        if bucket is not None and not bucket.try_acquire():
+            return False
+        self._consume(api)
+        return True
+    
+    def _consume(self, api):
+        quota = self.quotas.get(api)
+        day = self._today()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT used FROM api_quota WHERE day = ? AND api = ?", (day, api)
+                ).fetchone()
+                used = row[0] if row else 0
+                if quota is not None and used >= quota:
+                    raise QuotaExceededError(f"오늘의 {api} API 할당량({quota:,}회)을 모두 사용했습니다.")
+                self._conn.execute(
+                    "INSERT INTO api_quota (day, api, used) VALUES (?, ?, 1) "
+                    "ON CONFLICT (day, api) DO UPDATE SET used = used + 1",
+                    (day, api)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def used(self, api):
+        """오늘 사용한 호출 수"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM api_quota WHERE day = ? AND api = ?", (self._today(), api)
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def remaining(self, api):
+        """오늘 남은 호출 수 (한도가 없으면 None)"""
+        quota = self.quotas.get(api)
+        if quota is None:
+            return None
+        return max(quota - self.used(api), 0)
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청을 하나의 실제 호출로 합치는 장치
+    
+    처음 들어온 요청(leader)만 함수를 실행하고, 실행 중에 같은 키로 들어온
+    요청은 그 결과(또는 예외)를 함께 받습니다. 프로세스 전체에서 공유합니다.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leaders = Counter()
+        self.coalesced = Counter()
+    
+    def do(self, api, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.leaders[api] += 1
+            else:
+                self.coalesced[api] += 1
+        
+        if leader:
+            try:
+                flight.set_result(fn())
+            except BaseException as e:
+                flight.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._flights[key]
+        return flight.result()
+    
+    def stats(self):
+        """API별 실제 호출 수와 합쳐진(대기만 한) 요청 수"""
+        with self._lock:
+            return {"leaders": dict(self.leaders), "coalesced": dict(self.coalesced)}
+
+
+class SearchCancelled(Exception):
+    """취소된 검색 작업이 새 API 호출을 시작하려 함"""
+
+
+class SearchJob:
+    """취소할 수 있는 검색 작업 하나
+    
+    cancel_event를 LocalProductFinder에 넘기면, 취소된 뒤에는 대기 중인 가게 확인과
+    새 API 호출, 재시도를 시작하지 않습니다. 이미 보낸 요청은 끝까지 받아 캐시에 저장합니다.
+    """
+    
+    def __init__(self, owner):
+        self.job_id = uuid.uuid4().hex
+        self.owner = owner
+        self.cancel_event = threading.Event()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class JobRegistry:
+    """세션(owner)별로 진행 중인 검색 작업 목록
+    
+    같은 세션에서 새 검색을 시작하면 이전 작업을 취소합니다. 프로세스 전체에서 공유합니다.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}  # owner -> SearchJob
+        self.cancelled = 0
+    
+    def start(self, owner):
+        """owner의 새 작업 시작 (진행 중인 이전 작업은 취소)"""
+        job = SearchJob(owner)
+        with self._lock:
+            previous = self._jobs.get(owner)
+            self._jobs[owner] = job
+        if previous is not None:
+            self._cancel(previous)
+        return job
+    
+    def finish(self, job):
+        """작업을 목록에서 빼고, 아직 남은 호출이 있으면 취소 (끝난 작업이면 영향 없음)"""
+        with self._lock:
+            if self._jobs.get(job.owner) is job:
+                del self._jobs[job.owner]
+        job.cancel()
+    
+    @contextlib.contextmanager
+    def run(self, owner):
+        """with 블록 동안 owner의 작업을 진행 (블록이 예외/중단으로 끝나면 남은 호출 취소)"""
+        job = self.start(owner)
+        try:
+            yield job
+        except BaseException:
+            self._cancel(job)
+            raise
+        finally:
+            self.finish(job)
+    
+    def cancel_inactive(self, is_active):
+        """is_active(owner)가 거짓인(종료된 세션의) 작업을 모두 취소"""
+        with self._lock:
+            ended = [job for owner, job in self._jobs.items() if not is_active(owner)]
+            for job in ended:
+                del self._jobs[job.owner]
+        for job in ended:
+            self._cancel(job)
+        return len(ended)
+    
+    def _cancel(self, job):
+        if not job.cancelled:
+            job.cancel()
+            with self._lock:
+                self.cancelled += 1
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+# 블로그 제목/본문의 HTML 태그
+TAG_PATTERN = re.compile('<.*?>')
+
+# API 서버 주소 (로컬 모의 서버나 프록시로 바꿀 때 환경 변수로 지정)
+KAKAO_API_BASE_URL = os.environ.get("KAKAO_API_BASE_URL", "https://dapi.kakao.com")
+NAVER_API_BASE_URL = os.environ.get("NAVER_API_BASE_URL", "https://openapi.naver.com")
+
+# 카카오 키워드 검색 제한 (page 1~45, size 1~15)
+KAKAO_MAX_PAGE = 45
+KAKAO_MAX_PAGE_SIZE = 15
+
+# 계측 설정
+METRICS_LOGGER = logging.getLogger("product_finder.metrics")
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # 초
+
+
+class Metrics:
+    """검색 단계별 소요 시간, API 응답 시간 히스토그램, 상태 코드 집계
+    
+    enabled가 거짓이면 phase()는 아무 일도 하지 않는 공용 컨텍스트를 돌려주고
+    record_*는 바로 반환하므로 계측을 끈 상태의 비용은 무시할 수 있습니다.
+    켜져 있으면 각 기록을 JSON 한 줄로 METRICS_LOGGER에 남깁니다.
+    """
+    
+    _DISABLED_PHASE = contextlib.nullcontext()
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.phase_seconds = Counter()
+        self.phase_counts = Counter()
+        self.latency_buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self.latency_sum = Counter()
+        self.latency_count = Counter()
+        self.status_codes = Counter()  # (api, 상태 코드)
+    
+    def phase(self, name):
+        """with 문으로 감싼 구간의 소요 시간을 name 단계로 기록"""
+        if not self.enabled:
+            return self._DISABLED_PHASE
+        return self._timed_phase(name)
+    
+    @contextlib.contextmanager
+    def _timed_phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+    
+    def record_phase(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.phase_seconds[name] += seconds
+            self.phase_counts[name] += 1
+        METRICS_LOGGER.info(json.dumps({"event": "phase", "phase": name, "seconds": round(seconds, 6)}))
+    
+    def record_request(self, api, status, seconds):
+        """실제 API 호출 1회 (status는 HTTP 상태 코드 또는 'error')"""
+        if not self.enabled:
+            return
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            self.latency_buckets[api][bucket] += 1
+            self.latency_sum[api] += seconds
+            self.latency_count[api] += 1
+            self.status_codes[(api, str(status))] += 1
+        METRICS_LOGGER.info(json.dumps({
+            "event": "upstream_request", "api": api, "status": status, "seconds": round(seconds, 6)
+        }))
+    
+    def phase_totals(self):
+        """단계별 (누적 시간, 횟수)"""
+        with self._lock:
+            return {name: (self.phase_seconds[name], self.phase_counts[name]) for name in self.phase_seconds}
+    
+    def to_prometheus(self, http=None, cache=None, single_flight=None):
+        """Prometheus 텍스트 형식으로 내보내기"""
+        lines = []
+        
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        
+        with self._lock:
+            metric("product_finder_phase_seconds_total", "counter", "검색 단계별 누적 소요 시간",
+                   [({"phase": name}, round(value, 6)) for name, value in sorted(self.phase_seconds.items())])
+            metric("product_finder_phase_runs_total", "counter", "검색 단계별 실행 횟수",
+                   [({"phase": name}, value) for name, value in sorted(self.phase_counts.items())])
+            
+            histogram = []
+            for api in sorted(self.latency_buckets):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.latency_buckets[api]):
+                    cumulative += count
+                    histogram.append(({"api": api, "le": bound}, cumulative))
+            metric("product_finder_upstream_latency_seconds", "histogram", "API 응답 시간", [])
+            lines.extend(
+                f'product_finder_upstream_latency_seconds_bucket{{api="{labels["api"]}",le="{labels["le"]}"}} {value}'
+                for labels, value in histogram
+            )
+            lines.extend(f'product_finder_upstream_latency_seconds_sum{{api="{api}"}} {round(value, 6)}'
+                         for api, value in sorted(self.latency_sum.items()))
+            lines.extend(f'product_finder_upstream_latency_seconds_count{{api="{api}"}} {value}'
+                         for api, value in sorted(self.latency_count.items()))
+            
+            metric("product_finder_upstream_responses_total", "counter", "API 응답 상태 코드별 횟수",
+                   [({"api": api, "code": code}, value) for (api, code), value in sorted(self.status_codes.items())])
+        
+        if http is not None:
+            metric("product_finder_retries_total", "counter", "재시도 횟수",
+                   [({"api": api}, value) for api, value in sorted(http.retries.items())])
+            metric("product_finder_hedged_requests_total", "counter", "헤지 요청 횟수",
+                   [({"api": api}, value) for api, value in sorted(http.hedged.items())])
+        if cache is not None:
+            stats = cache.stats()
+            metric("product_finder_cache_hits_total", "counter", "응답 캐시 적중",
+                   [({"api": api}, value) for api, value in sorted(stats["hits"].items())])
+            metric("product_finder_cache_misses_total", "counter", "응답 캐시 미스",
+                   [({"api": api}, value) for api, value in sorted(stats["misses"].items())])
+            metric("product_finder_cache_hit_ratio", "gauge", "응답 캐시 적중률", [({}, round(stats["hit_ratio"], 4))])
+        if single_flight is not None:
+            metric("product_finder_coalesced_requests_total", "counter", "합쳐진 동시 요청",
+                   [({"api": api}, value) for api, value in sorted(single_flight.stats()["coalesced"].items())])
+        return "\n".join(lines) + "\n"
+
+
+# 계측을 쓰지 않을 때의 기본값
+DISABLED_METRICS = Metrics(enabled=False)
+
+# HTTP 설정
+HTTP_TIMEOUT = (3.05, 10)  # (연결, 읽기) 초
+HTTP_POOL_SIZE = 20
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """API별 최근 응답 시간 기록 (헤지 요청 기준값 계산용)"""
+    
+    def __init__(self, window=200):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+    
+    def record(self, api, seconds):
+        with self._lock:
+            self._samples[api].append(seconds)
+    
+    def percentile(self, api, q, min_samples=HEDGE_MIN_SAMPLES):
+        """q 백분위 응답 시간 (표본이 부족하면 None)"""
+        with self._lock:
+            samples = sorted(self._samples[api])
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * q / 100))
+        return samples[index]
+
+
+class HttpClient:
+    """연결 풀을 공유하는 HTTP 클라이언트
+    
+    keep-alive 세션을 재사용하고, 연결/읽기 타임아웃과 429/5xx 응답에 대한
+    지수 백오프(+지터) 재시도를 적용합니다. hedge=True로 요청하면 첫 요청이
+    최근 p95 응답 시간(또는 hedge_after 초)을 넘길 때 같은 요청을 한 번 더 보내고
+    먼저 도착한 응답을 사용합니다.
+    """
+    
+    def __init__(self, timeout=HTTP_TIMEOUT, max_retries=HTTP_MAX_RETRIES,
+                 pool_size=HTTP_POOL_SIZE, hedge_after=None, metrics=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.metrics = metrics or DISABLED_METRICS
+        self.latency = LatencyTracker()
+        self.calls = Counter()
+        self.retries = Counter()
+        self.hedged = Counter()
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="hedge")
+    
+    def get(self, api, url, headers, params, hedge=False, cancel_event=None, rate_limiter=None):
+        """재시도를 포함한 GET 요청 (최종 실패 시 requests 예외 발생)
+        
+        cancel_event가 설정되면 백오프 대기에서 바로 깨어나 더 재시도하지 않고
+        마지막 실패를 그대로 전달하며, 헤지 요청도 보내지 않습니다.
+        rate_limiter가 있으면 재시도와 헤지 요청을 포함해 실제로 보내는 요청마다
+        토큰과 할당량을 차감하며, 할당량이 없으면(QuotaExceededError) 재시도하지 않습니다.
+        호출 속도 제한 대기는 헤지 기준 시간에 넣지 않고, 헤지 요청은 기다리지 않고
+        보낼 수 있을 때만 보냅니다.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._send(api, url, headers, params, hedge, cancel_event, rate_limiter)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries or self._is_cancelled(cancel_event):
+                    raise
+                self.retries[api] += 1
+                if self._wait_backoff(self._backoff_delay(attempt), cancel_event):
+                    raise
+                continue
+            
+            if (response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries
+                    and not self._is_cancelled(cancel_event)):
+                self.retries[api] += 1
+                if not self._wait_backoff(self._backoff_delay(attempt, response.headers.get("Retry-After")), cancel_event):
+                    continue
+            
+            response.raise_for_status()
+            return response
+    
+    @staticmethod
+    def _is_cancelled(cancel_event):
+        return cancel_event is not None and cancel_event.is_set()
+    
+    @staticmethod
+    def _wait_backoff(delay, cancel_event):
+        """백오프 대기 (대기 중 취소되면 바로 True 반환)"""
+        if cancel_event is None:
+            time.sleep(delay)
+            return False
+        return cancel_event.wait(delay)
+    
+    def _backoff_delay(self, attempt, retry_after=None):
+        """지수 백오프 + full jitter (Retry-After 헤더가 있으면 그 이상 대기)"""
+        delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), HTTP_BACKOFF_MAX))
+            except ValueError:
+                pass
+        return delay
+    
+    def _timed_get(self, api, url, headers, params):
+        self.calls[api] += 1
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+        except requests.RequestException:
+            self.metrics.record_request(api, "error", time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        self.latency.record(api, elapsed)
+        self.metrics.record_request(api, response.status_code, elapsed)
+        return response
+    
+    def _send(self, api, url, headers, params, hedge, cancel_event=None, rate_limiter=None):
+        # 첫 요청의 토큰/할당량은 헤지 기준 시간을 재기 전에 받음 (제한 대기는 지연으로 치지 않음)
+        if rate_limiter is not None:
+            rate_limiter.acquire(api)
+        
+        threshold = None
+        if hedge:
+            threshold = self.hedge_after or self.latency.percentile(api, HEDGE_PERCENTILE)
+        if threshold is None:
+            return self._timed_get(api, url, headers, params)
+        
+        first = self._hedge_executor.submit(self._timed_get, api, url, headers, params)
+        done, _ = wait([first], timeout=threshold)
+        if done or self._is_cancelled(cancel_event):
+            return first.result()
+        
+        # 호출 속도 제한에 걸려 있거나 할당량이 없으면 헤지하지 않고 첫 요청을 기다림
+        if rate_limiter is not None:
+            try:
+                if not rate_limiter.try_acquire(api):
+                    return first.result()
+            except QuotaExceededError:
+                return first.result()
+        
+        self.hedged[api] += 1
+        second = self._hedge_executor.submit(self._timed_get, api, url, headers, params)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        # 둘 다 실패하면 첫 요청의 예외를 그대로 전달
+        return first.result()
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """신뢰도 계산 가중치와 상태 구분 기준"""
+    
+    product_weight: float = 0.5  # 상품 언급률
+    store_weight: float = 0.2    # 가게 언급률
+    recent_weight: float = 0.2   # 최근 게시물 비율
+    volume_weight: float = 0.1   # 전체 게시물 수
+    recent_days: int = 365       # 최근 게시물 기준 (일)
+    volume_target: int = 10      # 이 개수 이상이면 게시물 수 점수 만점
+    high_threshold: float = 0.7
+    medium_threshold: float = 0.4
+    
+    @property
+    def max_confidence(self):
+        """가중치 합계 - 아직 확인하지 않은 가게가 받을 수 있는 최고 점수"""
+        return self.product_weight + self.store_weight + self.recent_weight + self.volume_weight
+    
+    def level(self, confidence):
+        """신뢰도 등급 (0: 높음, 1: 보통, 2: 낮음)"""
+        if confidence >= self.high_threshold:
+            return 0
+        if confidence >= self.medium_threshold:
+            return 1
+        return 2
+
+
+DEFAULT_SCORING = ScoringConfig()
+
+
+class StageStore:
+    """검색 단계별 원본 결과(장소 목록, 블로그 응답)를 보관하는 LRU 저장소
+    
+    세션마다 하나씩 두고 LocalProductFinder에 넘기면, 상품만 바꾼 검색은 장소 목록을,
+    가중치만 바꾼 경우는 블로그 응답을 다시 받지 않고 재사용합니다.
+    """
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+# 가게명 끝의 지점 표기 (예: "OO떡집 강남점", "OO떡집(본점)")
+BRANCH_SUFFIX_PATTERN = re.compile(r'(?:\s*\([^()]*점\)|\s+\S*점)$')
+
+# 상품명 별칭 (띄어쓰기 차이는 정규화로 처리하므로 다른 표기만 적음)
+PRODUCT_SYNONYMS = {
+    "배추김치": ("포기김치",),
+    "모싯잎송편": ("모시송편", "모시잎송편"),
+    "인절미": ("콩고물떡",),
+}
+
+
+def normalize_text(text):
+    """매칭용 정규화: HTML 태그/엔티티 제거, NFC, 소문자, 모든 공백 제거"""
+    text = TAG_PATTERN.sub('', text or '')
+    if '&' in text:
+        text = html.unescape(text)
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return ''.join(text.lower().split())
+
+
+def store_aliases(store_name):
+    """가게명과 지점 표기를 뺀 이름"""
+    aliases = [store_name]
+    base = BRANCH_SUFFIX_PATTERN.sub('', store_name).strip()
+    if base and base != store_name and len(normalize_text(base)) >= 2:
+        aliases.append(base)
+    return aliases
+
+
+def product_aliases(product, synonyms=None):
+    """상품명과 별칭 목록"""
+    synonyms = PRODUCT_SYNONYMS if synonyms is None else synonyms
+    return [product, *synonyms.get(product, ())]
+
+
+# 표기가 이 개수 이상이면 Aho-Corasick 오토마톤으로 찾음 (적으면 포함 여부 확인이 더 빠름)
+AUTOMATON_MIN_PATTERNS = 10
+
+
+class TextMatcher:
+    """여러 검색어(별칭 포함)를 정규화된 글에서 한 번에 찾는 매처
+    
+    terms는 {키: [표기, ...]}이며 find()는 글에 나온 키 집합을 반환합니다.
+    표기가 많고 pyahocorasick이 있으면 Aho-Corasick 오토마톤으로 글을 한 번만 훑고,
+    아니면 정규화된 표기마다 포함 여부를 확인합니다.
+    """
+    
+    def __init__(self, terms):
+        patterns = defaultdict(set)
+        for key, aliases in terms.items():
+            for alias in aliases:
+                normalized = normalize_text(alias)
+                if normalized:
+                    patterns[normalized].add(key)
+        self._patterns = [(pattern, frozenset(keys)) for pattern, keys in patterns.items()]
+        
+        self._automaton = None
+        if ahocorasick is not None and len(self._patterns) >= AUTOMATON_MIN_PATTERNS:
+            self._automaton = ahocorasick.Automaton()
+            for pattern, keys in self._patterns:
+                self._automaton.add_word(pattern, keys)
+            self._automaton.make_automaton()
+    
+    def find(self, normalized_text):
+        """normalize_text를 거친 글에 나온 키 집합"""
+        found = set()
+        if self._automaton is not None:
+            for _, keys in self._automaton.iter(normalized_text):
+                found |= keys
+        else:
+            for pattern, keys in self._patterns:
+                if pattern in normalized_text:
+                    found |= keys
+        return found
+
+
+# 가게/상품 조합별로 만든 매처를 재사용 (가게를 하나씩 확인해도 조합마다 한 번만 생성)
+TEXT_MATCHER_CACHE_ENTRIES = 5000
+TEXT_MATCHERS = StageStore(TEXT_MATCHER_CACHE_ENTRIES)
+
+# 게시일 문자열 -> datetime (형식이 틀리면 None) - 같은 날짜를 글마다 다시 파싱하지 않음
+# 글마다 조회하므로 잠금 없는 dict로 두고, 가득 차면 비움
+# (조회는 get 한 번으로 끝내 다른 스레드가 중간에 비워도 KeyError가 나지 않음)
+POSTDATE_CACHE_ENTRIES = 5000
+_postdates = {}
+_NOT_PARSED = object()
+
+
+def matcher_for(names, synonyms=None):
+    """(가게명, 상품명) 목록의 가게/상품 별칭을 찾는 TextMatcher (기본 별칭이면 캐시에서 재사용)"""
+    names = tuple(sorted(set(names)))
+    matcher = TEXT_MATCHERS.get(names) if synonyms is None else None
+    if matcher is None:
+        terms = {}
+        for store_name, product in names:
+            terms[('store', store_name)] = store_aliases(store_name)
+            terms[('product', product)] = product_aliases(product, synonyms)
+        matcher = TextMatcher(terms)
+        if synonyms is None:
+            TEXT_MATCHERS.put(names, matcher)
+    return matcher
+
+
+def parse_postdate(postdate):
+    """네이버 블로그 게시일(YYYYMMDD) 파싱 (형식이 틀리면 None)"""
+    parsed = _postdates.get(postdate, _NOT_PARSED)
+    if parsed is not _NOT_PARSED:
+        return parsed
+    try:
+        parsed = datetime.strptime(postdate, '%Y%m%d')
+    except (TypeError, ValueError):
+        parsed = None
+    if len(_postdates) >= POSTDATE_CACHE_ENTRIES:
+        _postdates.clear()
+    _postdates[postdate] = parsed
+    return parsed
+
+
+# 지도 영역 검색: 전 세계 공통 위경도 격자의 한 칸(타일)이 카카오 rect 검색 한 번의 단위
+TILE_SIZE_DEG = 0.02          # 약 2.2km(남북) × 1.8km(동서)
+TILE_MAX_SPLITS = 2           # 결과가 45개를 넘는 타일은 4등분해 다시 검색 (최대 2번)
+MAX_VIEWPORT_TILES = 36       # 화면 한 번에 새로 받을 최대 타일 수 (넘으면 중심에 가까운 타일부터)
+MAX_VIEWPORT_FACTOR = 4       # 영역의 타일 수가 max_tiles의 이 배수를 넘으면 검색하지 않음 (확대 필요)
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180  # 위도 1도의 거리 (m, 약 111km)
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """두 좌표 사이 거리 (m, 하버사인 공식)"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def tile_extent(bounds, tile_size=TILE_SIZE_DEG):
+    """(남, 서, 북, 동) 영역과 겹치는 타일 번호 범위 (min_x, max_x, min_y, max_y)"""
+    south, west, north, east = bounds
+    return (math.floor(west / tile_size), math.floor(east / tile_size),
+            math.floor(south / tile_size), math.floor(north / tile_size))
+
+
+def tile_count(bounds, tile_size=TILE_SIZE_DEG):
+    """영역과 겹치는 타일 수 (타일을 만들지 않고 계산)"""
+    min_x, max_x, min_y, max_y = tile_extent(bounds, tile_size)
+    return (max_x - min_x + 1) * (max_y - min_y + 1)
+
+
+def viewport_too_large(bounds, max_tiles=MAX_VIEWPORT_TILES, tile_size=TILE_SIZE_DEG):
+    """지도 영역 검색을 하기엔 너무 넓은 영역인지 (확대해야 검색)"""
+    return tile_count(bounds, tile_size) > max_tiles * MAX_VIEWPORT_FACTOR
+
+
+def ring_cells(cx, cy, ring, extent):
+    """(cx, cy)에서 체비쇼프 거리가 ring인 칸 중 extent(min_x, max_x, min_y, max_y) 안의 칸"""
+    if ring == 0:
+        return [(cx, cy)]
+    min_x, max_x, min_y, max_y = extent
+    x_range = range(max(cx - ring, min_x), min(cx + ring, max_x) + 1)
+    y_range = range(max(cy - ring + 1, min_y), min(cy + ring - 1, max_y) + 1)
+    cells = []
+    for iy in (cy - ring, cy + ring):
+        if min_y <= iy <= max_y:
+            cells.extend((ix, iy) for ix in x_range)
+    for ix in (cx - ring, cx + ring):
+        if min_x <= ix <= max_x:
+            cells.extend((ix, iy) for iy in y_range)
+    return cells
+
+
+def tiles_in_bounds(bounds, tile_size=TILE_SIZE_DEG):
+    """(남, 서, 북, 동) 영역과 겹치는 타일 (ix, iy)을 영역 중심에서 바깥쪽으로 한 겹씩 생성
+    
+    필요한 만큼만 꺼내 쓰도록 제너레이터이며, 같은 겹 안에서는 중심에 가까운 순입니다.
+    """
+    south, west, north, east = bounds
+    extent = min_x, max_x, min_y, max_y = tile_extent(bounds, tile_size)
+    center_x, center_y = (west + east) / 2 / tile_size, (south + north) / 2 / tile_size
+    cx, cy = math.floor(center_x), math.floor(center_y)
+    for ring in range(max(cx - min_x, max_x - cx, cy - min_y, max_y - cy) + 1):
+        cells = ring_cells(cx, cy, ring, extent)
+        cells.sort(key=lambda tile: (tile[0] + 0.5 - center_x) ** 2 + (tile[1] + 0.5 - center_y) ** 2)
+        yield from cells
+
+
+def tile_bounds(tile, tile_size=TILE_SIZE_DEG):
+    """타일의 (남, 서, 북, 동) 영역"""
+    ix, iy = tile
+    return iy * tile_size, ix * tile_size, (iy + 1) * tile_size, (ix + 1) * tile_size
+
+
+class SpatialIndex:
+    """지도 영역 검색으로 찾은 장소를 담는 메모리 격자 인덱스 (카테고리마다 하나)
+    
+    장소는 id로 중복 없이 타일 크기의 격자 칸에 나눠 담고, 이미 받은 타일도
+    기록해 두어 다시 지나가는 영역은 API 호출 없이 영역/반경/가까운 N곳 질의에
+    답합니다.
+    """
+    
+    def __init__(self, tile_size=TILE_SIZE_DEG):
+        self.tile_size = tile_size
+        self._cells = defaultdict(dict)  # (ix, iy) -> {id: place}
+        self._ids = set()
+        self._covered = set()            # 검색을 마친 타일
+        self._lock = threading.Lock()
+    
+    def _cell(self, lat, lng):
+        return math.floor(lng / self.tile_size), math.floor(lat / self.tile_size)
+    
+    def add(self, places):
+        """장소 추가 (이미 있는 id는 건너뜀), 새로 추가한 개수 반환"""
+        added = 0
+        with self._lock:
+            for place in places:
+                if place['id'] in self._ids:
+                    continue
+                self._ids.add(place['id'])
+                self._cells[self._cell(float(place['y']), float(place['x']))][place['id']] = place
+                added += 1
+        return added
+    
+    def mark_covered(self, tile):
+        with self._lock:
+            self._covered.add(tile)
+    
+    def is_covered(self, tile):
+        with self._lock:
+            return tile in self._covered
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+    
+    def in_bounds(self, bounds):
+        """(남, 서, 북, 동) 영역 안의 장소 목록
+        
+        영역의 타일보다 장소가 있는 칸이 적으면(넓은 영역) 있는 칸만 훑습니다.
+        """
+        south, west, north, east = bounds
+        min_x, max_x, min_y, max_y = tile_extent(bounds, self.tile_size)
+        with self._lock:
+            if tile_count(bounds, self.tile_size) <= len(self._cells):
+                cells = [self._cells.get(tile, {}) for tile in tiles_in_bounds(bounds, self.tile_size)]
+            else:
+                cells = [
+                    cell for (ix, iy), cell in self._cells.items()
+                    if min_x <= ix <= max_x and min_y <= iy <= max_y
+                ]
+            return [
+                place
+                for cell in cells
+                for place in cell.values()
+                if south <= float(place['y']) <= north and west <= float(place['x']) <= east
+            ]
+    
+    def within_radius(self, lat, lng, radius_m):
+        """(lat, lng)에서 radius_m 안의 장소를 가까운 순으로 [(거리, 장소), ...] 반환"""
+        lat_span = radius_m / METERS_PER_DEGREE
+        # 영역 안에서 경도 1도가 가장 짧은 위도 기준으로 넉넉하게 잡음
+        lng_span = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + lat_span, 90))), 1e-6))
+        candidates = self.in_bounds((lat - lat_span, lng - lng_span, lat + lat_span, lng + lng_span))
+        found = [(distance_m(lat, lng, float(place['y']), float(place['x'])), place) for place in candidates]
+        found = [(d, place) for d, place in found if d <= radius_m]
+        found.sort(key=lambda item: item[0])
+        return found
+    
+    def nearest(self, lat, lng, n, bounds=None):
+        """(lat, lng)에서 가까운 n곳을 [(거리, 장소), ...]로 반환 (bounds가 있으면 그 안에서만)
+        
+        중심 칸부터 한 겹씩 넓혀 가며, n번째로 가까운 장소가 다음 겹의 최소 거리보다
+        가까우면 멈춥니다.
+        """
+        with self._lock:
+            if not self._cells or n <= 0:
+                return []
+            cells = list(self._cells)
+        min_x = min(ix for ix, _ in cells)
+        max_x = max(ix for ix, _ in cells)
+        min_y = min(iy for _, iy in cells)
+        max_y = max(iy for _, iy in cells)
+        if bounds is not None:
+            # 영역 밖의 칸까지 넓힐 필요는 없음
+            (south_x, south_y), (north_x, north_y) = self._cell(bounds[0], bounds[1]), self._cell(bounds[2], bounds[3])
+            min_x, max_x = max(min_x, south_x), min(max_x, north_x)
+            min_y, max_y = max(min_y, south_y), min(max_y, north_y)
+        
+        cx, cy = self._cell(lat, lng)
+        
+        best = []  # (-거리, id, 장소) 최대 힙
+        # 장소가 있는 칸 범위에 처음 닿는 겹부터 시작
+        ring = max(min_x - cx, cx - max_x, min_y - cy, cy - max_y, 0)
+        while True:
+            cells = ring_cells(cx, cy, ring, (min_x, max_x, min_y, max_y))
+            with self._lock:
+                places = [place for cell in cells for place in self._cells.get(cell, {}).values()]
+            for place in places:
+                y, x = float(place['y']), float(place['x'])
+                if bounds is not None and not (bounds[0] <= y <= bounds[2] and bounds[1] <= x <= bounds[3]):
+                    continue
+                item = (-distance_m(lat, lng, y, x), place['id'], place)
+                if len(best) < n:
+                    heapq.heappush(best, item)
+                elif item[0] > best[0][0]:
+                    heapq.heapreplace(best, item)
+            
+            # 다음 겹의 장소는 적어도 ring칸 떨어져 있음 (경도 방향 칸은 다음 겹의 가장 높은 위도 기준)
+            edge_lat = min(abs(lat) + (ring + 1) * self.tile_size, 90)
+            ring_m = ring * self.tile_size * METERS_PER_DEGREE * math.cos(math.radians(edge_lat))
+            settled = len(best) == n and -best[0][0] <= ring_m
+            exhausted = cx - ring <= min_x and cx + ring >= max_x and cy - ring <= min_y and cy + ring >= max_y
+            if settled or exhausted:
+                break
+            ring += 1
+        
+        return [(-d, place) for d, _, place in sorted(best, reverse=True)]
+
+
+# 이 개수를 넘으면 지도 마커를 클라이언트에서 클러스터링
+CLUSTER_MARKER_THRESHOLD = 50
+
+# 신뢰도 등급(ScoringConfig.level)별 지도 마커 색상과 아이콘
+MARKER_STYLES = (('green', 'star'), ('orange', 'info-sign'), ('red', 'question-sign'))
+
+# 클러스터 지도의 마커 생성 함수 (row = [위도, 경도, 신뢰도 등급, 팝업 HTML, 가게명])
+CLUSTER_MARKER_CALLBACK = """
+function (row) {
+    var color = ['green', 'orange', 'red'][row[2]];
+    var icon = ['star', 'info-sign', 'question-sign'][row[2]];
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.setIcon(L.AwesomeMarkers.icon({icon: icon, markerColor: color, prefix: 'glyphicon'}));
+    marker.bindPopup(row[3], {maxWidth: 300});
+    marker.bindTooltip(row[4]);
+    return marker;
+}
+"""
+
+
+def result_fingerprint(places):
+    """검색 결과 목록의 지문 (표시되는 값이 같으면 같은 값)"""
+    digest = hashlib.sha1()
+    for place in places:
+        digest.update(json.dumps([
+            place.get('id'), place['place_name'], place.get('address_name'), place.get('phone'),
+            place['x'], place['y'], place['confidence'], place['status'], place.get('blog_count'),
+            place.get('product_confidences')
+        ], ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# 여러 상품을 한 번에 확인할 때 가게마다 가져올 블로그 글 수 (네이버 최대 100)
+MULTI_PRODUCT_DISPLAY = 50
+
+# 적응형 블로그 확인: 페이지 크기, 가게당 최대 글 수, 신뢰 구간 z값 (95%)
+ADAPTIVE_PAGE_SIZE = 10
+ADAPTIVE_ITEM_BUDGET = 50
+ADAPTIVE_Z = 1.96
+NAVER_MAX_START = 1000  # 네이버 검색 start 파라미터 최댓값
+
+# 할당량이 부족해 블로그를 확인하지 못한 가게의 상태 (신뢰도 점수가 아님)
+QUOTA_DEFERRED_STATUS = "⏸️ API 할당량 부족으로 확인 보류"
+# 상위 결과가 확정되어 확인을 건너뛴 가게의 상태
+SKIPPED_STATUS = "⏭️ 상위 결과가 확정되어 확인 생략"
+# 블로그 검색이 오류로 실패한 가게의 상태 (검색 결과가 없는 것과 구분)
+FETCH_FAILED_STATUS = "❗ 블로그 검색 오류로 확인 못함"
+
+# 신뢰도 비교 허용 오차 - 가중치 합계와 만점 점수가 더하는 순서에 따라 마지막 자리만 다를 수 있음
+CONFIDENCE_TOLERANCE = 1e-9
+
+
+class TopKRanking:
+    """도착하는 결과로 신뢰도 상위 k개를 힙에 유지
+    
+    전체를 다시 정렬하지 않고 결과마다 O(log k)로 갱신하며, 동점이면 입력 순번이
+    빠른 가게를 앞에 두어 최종 정렬(신뢰도 내림차순, 안정 정렬)과 같은 순서를 냅니다.
+    """
+    
+    def __init__(self, k):
+        self.k = k
+        self._heap = []  # (confidence, -순번, 순번, place) 최소 힙 - 맨 앞이 k번째
+    
+    def push(self, order, place):
+        entry = (place['confidence'], -order, order, place)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def ranked(self):
+        """현재 상위 k개 (신뢰도 내림차순)"""
+        return [entry[3] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+    
+    def kth_confidence(self):
+        """k번째 신뢰도 (아직 k개가 안 되면 None)"""
+        return self._heap[0][0] if len(self._heap) == self.k else None
+    
+    def is_settled(self, upper_bound):
+        """남은 가게가 upper_bound 이하만 받을 수 있을 때 상위 k개가 더 바뀌지 않는지 여부
+        
+        upper_bound는 ScoringConfig.max_confidence(가중치 합계)를 넘깁니다. 점수가 이 값을
+        넘을 수 없으므로 상위 k개가 모두 만점일 때만 확정됩니다.
+        """
+        kth = self.kth_confidence()
+        return kth is not None and kth >= upper_bound - CONFIDENCE_TOLERANCE
+
+
+# 카카오 장소 상세 페이지 주소 (이 형식이면 저장하지 않고 id로 다시 만듦)
+KAKAO_PLACE_URL = "http://place.map.kakao.com/{}"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PlaceResult:
+    """세션에 보관하는 검색 결과 한 건
+    
+    카카오 응답 dict 대신 표시에 쓰는 필드만 __slots__로 담습니다. 가게마다 반복되는
+    상태/카테고리 문자열은 intern해 한 객체를 공유하고, 좌표는 float로 바꾸며,
+    place_url은 id로 만들 수 있으면 저장하지 않습니다. 기존 dict 코드와 함께 쓸 수
+    있도록 place['confidence'], place.get('phone') 형태의 읽기도 지원합니다.
+    """
+    
+    __slots__ = (
+        'id', 'place_name', 'address_name', 'road_address_name', 'phone', 'category_name',
+        'distance', 'x', 'y', '_place_url', 'confidence', 'status', 'blog_count',
+        'product_confidences', 'product_statuses',
+    )
+    # place['...']로 읽을 수 있는 필드 (값이 없으면 None)
+    _FIELDS = frozenset(__slots__) - {'_place_url'} | {'place_url'}
+    
+    def __init__(self, id, place_name, address_name, road_address_name, phone, category_name,
+                 distance, x, y, place_url, confidence, status, blog_count,
+                 product_confidences=None, product_statuses=None):
+        self.id = id
+        self.place_name = place_name
+        self.address_name = address_name
+        self.road_address_name = road_address_name
+        self.phone = phone
+        self.category_name = _intern(category_name)
+        self.distance = distance
+        self.x = float(x)
+        self.y = float(y)
+        self._place_url = None if place_url == KAKAO_PLACE_URL.format(id) else place_url
+        self.confidence = confidence
+        self.status = _intern(status)
+        self.blog_count = blog_count
+        self.product_confidences = product_confidences
+        self.product_statuses = (
+            {product: _intern(status) for product, status in product_statuses.items()}
+            if product_statuses else None
+        )
+    
+    @classmethod
+    def from_place(cls, place):
+        """verify_places 결과(카카오 dict + 신뢰도)를 PlaceResult로 변환"""
+        return cls(
+            place.get('id'), place['place_name'], place.get('address_name'),
+            place.get('road_address_name'), place.get('phone'), place.get('category_name'),
+            place.get('distance'), place['x'], place['y'], place.get('place_url'),
+            place['confidence'], place['status'], place.get('blog_count', 0),
+            place.get('product_confidences'), place.get('product_statuses'),
+        )
+    
+    @property
+    def place_url(self):
+        if self._place_url is None and self.id:
+            return KAKAO_PLACE_URL.format(self.id)
+        return self._place_url
+    
+    def __getitem__(self, key):
+        """선언된 필드는 값이 없어도 None 반환, 모르는 키만 KeyError"""
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key, default=None):
+        """dict.get처럼 읽기 (모르는 키이거나 값이 없으면 default)"""
+        value = getattr(self, key) if key in self._FIELDS else None
+        return default if value is None else value
+    
+    def __setitem__(self, key, value):
+        if key == 'status':
+            value = _intern(value)
+        setattr(self, key, value)
+    
+    def __repr__(self):
+        return f"PlaceResult({self.place_name!r}, confidence={self.confidence:.3f}, status={self.status!r})"
+
+
+def compact_results(places):
+    """검색 결과 dict 목록을 PlaceResult 목록으로 변환 (이미 변환된 항목은 그대로)"""
+    return [place if isinstance(place, PlaceResult) else PlaceResult.from_place(place) for place in places]
+
+
+class LocalProductFinder:
+    def __init__(self, cache=None, http=None, hedge=False, rate_limiter=None, single_flight=None,
+                 kakao_base_url=None, naver_base_url=None, metrics=None, on_error=None,
+                 scoring=None, place_store=None, blog_store=None, adaptive=False, text_matching=False,
+                 cancel_event=None):
+        self.kakao_api_key = None
+        self.naver_client_id = None
+        self.naver_client_secret = None
+        self.kakao_base_url = (kakao_base_url or KAKAO_API_BASE_URL).rstrip('/')
+        self.naver_base_url = (naver_base_url or NAVER_API_BASE_URL).rstrip('/')
+        self.cache = cache
+        self.http = http or HttpClient()
+        self.hedge = hedge
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+        self.metrics = metrics or DISABLED_METRICS
+        self.on_error = on_error or logger.error  # UI에서는 사용자에게 보여줄 함수(st.error 등) 전달
+        self.scoring = scoring or DEFAULT_SCORING
+        self.place_store = place_store  # (위치, 카테고리) -> (장소 목록, 끝까지 받았는지)
+        self.blog_store = blog_store    # (가게명, 상품, display[, start]) -> 블로그 검색 응답
+        self.adaptive = adaptive        # 가게마다 필요한 만큼만 블로그 글을 더 받음
+        self.text_matching = text_matching  # 띄어쓰기/별칭을 허용하는 TextMatcher로 언급 확인
+        self.cancel_event = cancel_event    # 설정되면 새 API 호출과 남은 가게 확인을 시작하지 않음 (SearchJob)
+        
+    def setup_apis(self, kakao_key, naver_id, naver_secret):
+        """API 키 설정"""
+        self.kakao_api_key = kakao_key
+        self.naver_client_id = naver_id
+        self.naver_client_secret = naver_secret
+        
+    def check_cancelled(self):
+        """검색이 취소됐으면 SearchCancelled 발생
+        
+        API 오류를 표시하기 전에도 호출해, 취소로 재시도를 멈춘 실패는 오류 대신 취소로 전달합니다.
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchCancelled("검색이 취소되었습니다.")
+    
+    def _fetch_json(self, api, url, headers, params):
+        """GET 요청 후 JSON 반환
+        
+        캐시를 먼저 조회하고, 없으면 single-flight로 같은 요청을 동시에 보내는
+        다른 세션/스레드와 실제 호출 하나를 공유합니다. 실제 호출만 할당량을 차감합니다.
+        검색이 취소됐으면 캐시도 조회하지 않고 SearchCancelled를 발생시킵니다.
+        공유한 호출이 그 호출을 보낸 다른 검색의 취소로 중단되면, 이 검색은 취소되지
+        않은 한 같은 요청을 다시 보냅니다. 호출은 같은 API 키를 쓰는 요청끼리만
+        공유하므로, 잘못된 키로 받은 401/403 오류가 다른 세션에 전달되지 않습니다.
+        """
+        self.check_cancelled()
+        if self.cache is not None:
+            body = self.cache.get(api, url, params)
+            if body is not None:
+                return json.loads(body)
+        
+        if self.single_flight is not None:
+            key = self._flight_key(url, headers, params)
+            while True:
+                try:
+                    body = self.single_flight.do(api, key, lambda: self._fetch_body(api, url, headers, params))
+                    break
+                except SearchCancelled:
+                    self.check_cancelled()
+        else:
+            body = self._fetch_body(api, url, headers, params)
+        # 호출한 쪽마다 별도 객체를 받도록 본문에서 매번 파싱
+        return json.loads(body)
+    
+    @staticmethod
+    def _flight_key(url, headers, params):
+        """single-flight 키: 정규화한 요청 + 인증 헤더 해시 (키 원문은 남기지 않음)"""
+        credentials = hashlib.sha256(
+            json.dumps(sorted(headers.items()), ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return f"{ResponseCache.make_key(url, params)}#{credentials}"
+    
+    def _fetch_body(self, api, url, headers, params):
+        """실제 API 호출 후 응답 본문(UTF-8 문자열) 반환 및 캐시 저장
+        
+        호출 제한/할당량은 재시도와 헤지 요청까지 HttpClient가 보내는 요청마다 차감합니다.
+        취소로 재시도를 멈춘 실패는 SearchCancelled로 바꿔, 같은 호출을 기다리던 다른
+        검색이 오류로 받지 않고 다시 요청하게 합니다.
+        """
+        try:
+            response = self.http.get(
+                api, url, headers, params,
+                hedge=self.hedge, cancel_event=self.cancel_event, rate_limiter=self.rate_limiter
+            )
+        except requests.RequestException as e:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise SearchCancelled("검색이 취소되었습니다.") from e
+            raise
+        body = response.content.decode('utf-8')
+        
+        if self.cache is not None:
+            self.cache.set(api, url, params, body)
+        return body
+    
+    def search_places_kakao(self, location, category, size=15):
+        """카카오 맵 API로 장소 검색"""
+        if not self.kakao_api_key:
+            return []
+            
+        url = f"{self.kakao_base_url}/v2/local/search/keyword.json"
+        headers = {"Authorization": f"KakaoAK {self.kakao_api_key}"}
+        params = {
+            "query": f"{location} {category}",
+            "size": size
+        }
+        
+        try:
+            with self.metrics.phase("place_search"):
+                data = self._fetch_json("kakao", url, headers, params)
+            return data.get('documents', [])
+        except requests.RequestException as e:
+            self.check_cancelled()
+            self.on_error(f"장소 검색 중 오류 발생: {e}")
+            return []
+    
+    def iter_places_kakao(self, location, category, max_results=None, page_size=KAKAO_MAX_PAGE_SIZE):
+        """카카오 맵 API로 장소를 페이지 단위로 검색하며 하나씩 반환
+        
+        page 파라미터를 API 한도까지 넘기며, 같은 id의 장소는 한 번만 반환합니다.
+        meta.is_end가 참이거나 max_results개를 반환하면 멈춥니다. 각 페이지가
+        도착하는 즉시 반환하므로 다음 페이지를 받는 동안 검증을 시작할 수 있습니다.
+        
+        place_store가 있으면 끝까지 받은 목록을 (위치, 카테고리)별로 저장해 두고,
+        같은 조건의 다음 검색에서는 API 호출 없이 복사본을 반환합니다.
+        """
+        if self.place_store is None:
+            yield from self._iter_places_kakao(location, category, max_results, page_size)
+            return
+        
+        key = (location, category)
+        stored = self.place_store.get(key)
+        if stored is not None:
+            places, complete = stored
+            if complete or (max_results is not None and len(places) >= max_results):
+                for place in places[:max_results]:
+                    yield dict(place)
+                return
+        
+        collected = []
+        ok = yield from self._collect_places(
+            self._iter_places_kakao(location, category, max_results, page_size), collected
+        )
+        if ok:
+            complete = max_results is None or len(collected) < max_results
+            self.place_store.put(key, (collected, complete))
+    
+    @staticmethod
+    def _collect_places(places, collected):
+        """검증 전 원본 복사본을 collected에 모으며 그대로 반환 (원본 generator의 반환값 전달)"""
+        while True:
+            try:
+                place = next(places)
+            except StopIteration as stop:
+                return stop.value
+            collected.append(dict(place))
+            yield place
+    
+    def _iter_places_kakao(self, location, category, max_results, page_size):
+        """iter_places_kakao의 실제 API 호출 (오류로 멈추면 False 반환)"""
+        if not self.kakao_api_key:
+            return False
+        
+        url = f"{self.kakao_base_url}/v2/local/search/keyword.json"
+        headers = {"Authorization": f"KakaoAK {self.kakao_api_key}"}
+        seen_ids = set()
+        
+        for page in range(1, KAKAO_MAX_PAGE + 1):
+            params = {
+                "query": f"{location} {category}",
+                "size": page_size,
+                "page": page
+            }
+            
+            try:
+                with self.metrics.phase("place_search"):
+                    data = self._fetch_json("kakao", url, headers, params)
+            except requests.RequestException as e:
+                self.check_cancelled()
+                self.on_error(f"장소 검색 중 오류 발생: {e}")
+                return False
+            
+            for place in data.get('documents', []):
+                if place['id'] in seen_ids:
+                    continue
+                seen_ids.add(place['id'])
+                yield place
+                
+                if max_results is not None and len(seen_ids) >= max_results:
+                    return True
+            
+            if data.get('meta', {}).get('is_end', True):
+                return True
+        return True
+    
+    def search_viewport(self, category, bounds, index, max_results=None, max_tiles=MAX_VIEWPORT_TILES,
+                        max_workers=4):
+        """지도에 보이는 영역의 장소를 타일 단위로 검색
+        
+        bounds는 (남, 서, 북, 동)이며, 영역과 겹치는 타일 중 index에서 아직 검색하지
+        않은 타일만 카카오 rect 검색으로 받아 index에 더합니다. 한 번에 새로 받는 타일은
+        영역 중심에 가까운 순으로 max_tiles개까지이고, 이미 지나간 영역은 호출하지 않습니다.
+        영역이 너무 넓으면(viewport_too_large) 새로 받지 않고 index에 있는 장소만 돌려줍니다.
+        
+        영역 중심에서 가까운 max_results곳의 복사본(distance는 중심에서의 거리 m)과
+        한도를 넘어 받지 못한 타일 수를 (places, skipped_tiles)로 반환합니다.
+        """
+        fetch = []
+        skipped = 0
+        if viewport_too_large(bounds, max_tiles, index.tile_size):
+            skipped = tile_count(bounds, index.tile_size)
+        else:
+            for tile in tiles_in_bounds(bounds, index.tile_size):
+                if index.is_covered(tile):
+                    continue
+                if len(fetch) < max_tiles:
+                    fetch.append(tile)
+                else:
+                    skipped += 1
+        
+        if fetch:
+            def search_tile(tile):
+                return self._search_rect(category, tile_bounds(tile, index.tile_size))
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for tile, places in zip(fetch, executor.map(search_tile, fetch)):
+                    if places is not None:
+                        index.add(places)
+                        index.mark_covered(tile)
+        
+        south, west, north, east = bounds
+        limit = max_results if max_results is not None else len(index)
+        results = []
+        for distance, place in index.nearest((south + north) / 2, (west + east) / 2, limit, bounds=bounds):
+            place = dict(place)
+            place['distance'] = str(int(distance))
+            results.append(place)
+        return results, skipped
+    
+    def _search_rect(self, category, bounds, splits=TILE_MAX_SPLITS):
+        """카카오 rect 검색으로 (남, 서, 북, 동) 영역의 장소를 모두 받기 (오류가 나면 None)
+        
+        결과가 페이지 한도를 넘으면(total_count > pageable_count) 첫 페이지만 보고
+        영역을 4등분해 각각 다시 검색합니다.
+        """
+        if not self.kakao_api_key:
+            return None
+        
+        south, west, north, east = bounds
+        url = f"{self.kakao_base_url}/v2/local/search/keyword.json"
+        headers = {"Authorization": f"KakaoAK {self.kakao_api_key}"}
+        places = []
+        
+        for page in range(1, KAKAO_MAX_PAGE + 1):
+            params = {
+                "query": category,
+                "rect": f"{west:.7f},{south:.7f},{east:.7f},{north:.7f}",
+                "size": KAKAO_MAX_PAGE_SIZE,
+                "page": page
+            }
+            
+            try:
+                with self.metrics.phase("place_search"):
+                    data = self._fetch_json("kakao", url, headers, params)
+            except requests.RequestException as e:
+                self.check_cancelled()
+                self.on_error(f"장소 검색 중 오류 발생: {e}")
+                return None
+            
+            meta = data.get('meta', {})
+            if page == 1 and splits > 0 and meta.get('total_count', 0) > meta.get('pageable_count', 0):
+                mid_lat, mid_lng = (south + north) / 2, (west + east) / 2
+                for quarter in ((south, west, mid_lat, mid_lng), (south, mid_lng, mid_lat, east),
+                                (mid_lat, west, north, mid_lng), (mid_lat, mid_lng, north, east)):
+                    found = self._search_rect(category, quarter, splits - 1)
+                    if found is None:
+                        return None
+                    places.extend(found)
+                return places
+            
+            places.extend(data.get('documents', []))
+            if meta.get('is_end', True):
+                break
+        return places
+    
+    def search_blogs_naver(self, store_name, product=None, display=10, start=1):
+        """네이버 블로그 검색 API (product가 없으면 가게명으로만 검색)
+        
+        호출이 실패하면 빈 dict를 반환합니다. 결과가 없는 정상 응답은 items가 빈 목록입니다.
+        """
+        if not self.naver_client_id or not self.naver_client_secret:
+            return {}
+        
+        key = (store_name, product, display) if start == 1 else (store_name, product, display, start)
+        if self.blog_store is not None:
+            stored = self.blog_store.get(key)
+            if stored is not None:
+                return stored
+            
+        url = f"{self.naver_base_url}/v1/search/blog.json"
+        headers = {
+            "X-Naver-Client-Id": self.naver_client_id,
+            "X-Naver-Client-Secret": self.naver_client_secret
+        }
+        params = {
+            "query": f"{store_name} {product}" if product else store_name,
+            "display": display,
+            "sort": "date"
+        }
+        if start != 1:
+            params["start"] = start
+        
+        try:
+            with self.metrics.phase("blog_lookup"):
+                blog_data = self._fetch_json("naver", url, headers, params)
+        except QuotaExceededError:
+            # 빈 응답으로 돌려주면 "검색 결과 없음" 점수가 되므로 호출한 쪽에서 확인 보류로 처리
+            raise
+        except requests.RequestException as e:
+            self.check_cancelled()
+            self.on_error(f"블로그 검색 중 오류 발생: {e}")
+            return {}
+        
+        if self.blog_store is not None:
+            self.blog_store.put(key, blog_data)
+        return blog_data
+    
+    def search_blogs_adaptive(self, store_name, product, scoring=None, page_size=ADAPTIVE_PAGE_SIZE,
+                              item_budget=ADAPTIVE_ITEM_BUDGET, z=ADAPTIVE_Z):
+        """신뢰도 등급이 정해질 때까지 블로그 글을 페이지 단위로 더 받기
+        
+        첫 페이지(page_size개)를 받은 뒤, 글마다의 점수 기여도 평균에 대한 z 신뢰 구간
+        (유한 모집단 보정 포함)이 한 등급(높음/보통/낮음) 안에 들어오면 멈춥니다.
+        검색 결과를 모두 받았거나 가게당 item_budget개를 받아도 멈춥니다. 반환값은 받은
+        글을 모두 합친 검색 응답이며, 글이 날짜순이라 표본이 무작위가 아니므로 구간은
+        근사값입니다.
+        """
+        scoring = scoring or self.scoring
+        one_year_ago = datetime.now() - timedelta(days=scoring.recent_days)
+        
+        blog_data = self.search_blogs_naver(store_name, product, display=min(page_size, item_budget))
+        if not blog_data or not blog_data.get('items'):
+            return blog_data
+        
+        items = list(blog_data['items'])
+        available = min(blog_data.get('total', len(items)), item_budget, NAVER_MAX_START)
+        scores = [self._item_score(item, store_name, product, one_year_ago, scoring) for item in items]
+        
+        while len(items) < available and not self._evidence_settled(scores, available, scoring, z):
+            page = self.search_blogs_naver(
+                store_name, product, display=min(page_size, available - len(items)), start=len(items) + 1
+            )
+            page_items = page.get('items', []) if page else []
+            if not page_items:
+                break
+            items.extend(page_items)
+            scores.extend(self._item_score(item, store_name, product, one_year_ago, scoring) for item in page_items)
+        
+        return dict(blog_data, items=items, display=len(items))
+    
+    def _item_score(self, item, store_name, product, one_year_ago, scoring):
+        """글 하나가 신뢰도에 더하는 점수 (게시물 수 항목 제외)"""
+        product_hit, store_hit, recent = self._item_evidence(item, store_name, product, one_year_ago)
+        return product_hit * scoring.product_weight + store_hit * scoring.store_weight + recent * scoring.recent_weight
+    
+    @staticmethod
+    def _evidence_settled(scores, population, scoring, z):
+        """지금까지 받은 글로 추정한 신뢰도의 z 신뢰 구간이 한 등급 안에 있는지 여부"""
+        n = len(scores)
+        if n < 2:
+            return False
+        mean = sum(scores) / n
+        variance = sum((score - mean) ** 2 for score in scores) / (n - 1)
+        # 남은 글이 적을수록 구간이 좁아짐 (유한 모집단 보정)
+        correction = (population - n) / (population - 1) if population > n else 0.0
+        half_width = z * (variance / n * correction) ** 0.5
+        volume = min(n / scoring.volume_target, 1.0) * scoring.volume_weight
+        return scoring.level(mean + volume - half_width) == scoring.level(mean + volume + half_width)
+    
+    def calculate_confidence(self, blog_data, store_name, product, scoring=None):
+        """신뢰도 계산 (scoring이 없으면 self.scoring의 가중치 사용)"""
+        scoring = scoring or self.scoring
+        if not blog_data or 'items' not in blog_data:
+            return 0.0, "검색 결과 없음"
+        
+        items = blog_data['items']
+        total_count = len(items)
+        
+        if total_count == 0:
+            return 0.0, "관련 블로그 없음"
+        
+        # 점수 계산 요소들
+        product_mentions = 0
+        store_mentions = 0
+        recent_posts = 0
+        
+        # 최근 게시물 기준 (기본 1년)
+        one_year_ago = datetime.now() - timedelta(days=scoring.recent_days)
+        
+        for item in items:
+            product_hit, store_hit, recent = self._item_evidence(item, store_name, product, one_year_ago)
+            product_mentions += product_hit
+            store_mentions += store_hit
+            recent_posts += recent
+        
+        # 신뢰도 계산 (0-1 범위)
+        confidence = 0
+        confidence += min(product_mentions / total_count, 1.0) * scoring.product_weight  # 상품 언급률 (50%)
+        confidence += min(store_mentions / total_count, 1.0) * scoring.store_weight      # 가게 언급률 (20%)
+        confidence += min(recent_posts / total_count, 1.0) * scoring.recent_weight       # 최근 게시물 비율 (20%)
+        confidence += min(total_count / scoring.volume_target, 1.0) * scoring.volume_weight  # 전체 게시물 수 (10%)
+        
+        return confidence, self._confidence_status(confidence, product, scoring)
+    
+    @staticmethod
+    def _item_evidence(item, store_name, product, one_year_ago):
+        """블로그 글 하나의 (상품 언급, 가게 언급, 최근 게시물) 여부"""
+        title = item.get('title', '').lower()
+        description = item.get('description', '').lower()
+        
+        # HTML 태그 제거
+        title = TAG_PATTERN.sub('', title)
+        description = TAG_PATTERN.sub('', description)
+        
+        # 상품명 언급 확인
+        product_hit = product.lower() in title or product.lower() in description
+        
+        # 가게명 언급 확인
+        store_hit = store_name.lower() in title or store_name.lower() in description
+        
+        # 최근 게시물 확인 (날짜 파싱)
+        try:
+            recent = datetime.strptime(item.get('postdate', ''), '%Y%m%d') > one_year_ago
+        except (TypeError, ValueError):
+            recent = False
+        
+        return product_hit, store_hit, recent
+    
+    def _confidence_status(self, confidence, product, scoring=None):
+        """신뢰도에 따른 상태 메시지"""
+        scoring = scoring or self.scoring
+        if confidence >= scoring.high_threshold:
+            return f"✅ {product} 판매 가능성 높음"
+        elif confidence >= scoring.medium_threshold:
+            return f"⚠️ {product} 판매 가능성 보통"
+        else:
+            return f"❓ {product} 판매 정보 부족"
+    
+    def calculate_confidence_batch(self, batch, scoring=None):
+        """여러 가게의 신뢰도를 한 번에 계산
+        
+        batch는 (blog_data, store_name, product) 목록이며, 모든 블로그 글을 하나의
+        열 기반 표로 모아 태그 제거, 날짜 파싱, 언급 여부 확인과 가중치 계산을
+        배열 연산으로 처리합니다. 결과는 같은 순서의 (confidence, status) 목록으로
+        calculate_confidence를 하나씩 호출한 것과 동일합니다.
+        """
+        scoring = scoring or self.scoring
+        batch = list(batch)
+        results = [None] * len(batch)
+        
+        scored = []  # 블로그 글이 있는 batch 인덱스
+        store_index, titles, descriptions, postdates = [], [], [], []
+        for i, (blog_data, store_name, product) in enumerate(batch):
+            if not blog_data or 'items' not in blog_data:
+                results[i] = (0.0, "검색 결과 없음")
+                continue
+            items = blog_data['items']
+            if not items:
+                results[i] = (0.0, "관련 블로그 없음")
+                continue
+            
+            store_index.extend([len(scored)] * len(items))
+            scored.append(i)
+            for item in items:
+                titles.append(item.get('title', ''))
+                descriptions.append(item.get('description', ''))
+                postdates.append(item.get('postdate', ''))
+        
+        if not scored:
+            return results
+        
+        import numpy as np
+        import pandas as pd
+        
+        store_index = np.array(store_index)
+        store_count = len(scored)
+        
+        # 소문자화 + HTML 태그 제거 (object dtype으로 파이썬 문자열 규칙을 그대로 적용)
+        title = pd.Series(titles, dtype=object).str.lower().str.replace(TAG_PATTERN, '', regex=True)
+        description = pd.Series(descriptions, dtype=object).str.lower().str.replace(TAG_PATTERN, '', regex=True)
+        title = title.to_numpy(dtype=str)
+        description = description.to_numpy(dtype=str)
+        
+        # 글마다 해당 가게의 상품명/가게명을 붙여 한 번에 포함 여부 확인
+        products = np.array([batch[i][2].lower() for i in scored], dtype=str)[store_index]
+        stores = np.array([batch[i][1].lower() for i in scored], dtype=str)[store_index]
+        product_hit = (np.char.find(title, products) >= 0) | (np.char.find(description, products) >= 0)
+        store_hit = (np.char.find(title, stores) >= 0) | (np.char.find(description, stores) >= 0)
+        
+        # 최근 게시물 (파싱할 수 없는 날짜는 NaT가 되어 제외)
+        one_year_ago = datetime.now() - timedelta(days=scoring.recent_days)
+        post_date = pd.to_datetime(pd.Series(postdates, dtype=object), format='%Y%m%d', errors='coerce')
+        recent = (post_date > one_year_ago).to_numpy()
+        
+        total_count = np.bincount(store_index, minlength=store_count).astype(float)
+        product_mentions = np.bincount(store_index, weights=product_hit, minlength=store_count)
+        store_mentions = np.bincount(store_index, weights=store_hit, minlength=store_count)
+        recent_posts = np.bincount(store_index, weights=recent, minlength=store_count)
+        
+        # calculate_confidence와 같은 순서로 더해야 부동소수점 결과가 일치
+        confidence = np.zeros(store_count)
+        confidence += np.minimum(product_mentions / total_count, 1.0) * scoring.product_weight
+        confidence += np.minimum(store_mentions / total_count, 1.0) * scoring.store_weight
+        confidence += np.minimum(recent_posts / total_count, 1.0) * scoring.recent_weight
+        confidence += np.minimum(total_count / scoring.volume_target, 1.0) * scoring.volume_weight
+        
+        for k, i in enumerate(scored):
+            value = float(confidence[k])
+            results[i] = (value, self._confidence_status(value, batch[i][2], scoring))
+        return results
+    
+    def calculate_confidence_matched(self, batch, scoring=None, synonyms=None):
+        """TextMatcher로 여러 가게의 신뢰도를 한 번에 계산
+        
+        batch는 calculate_confidence_batch와 같은 (blog_data, store_name, product) 목록입니다.
+        같은 블로그 응답을 쓰는 항목끼리 묶어 가게명/상품명 별칭 매처 하나로 (조합별로
+        캐시해 가게를 하나씩 계산해도 다시 만들지 않음) 글마다 제목과 본문을 한 번만
+        정규화해 모든 표기를 한 번에 찾습니다. 게시일도 날짜 문자열마다 한 번만 파싱합니다. 띄어쓰기, HTML 엔티티, 지점 표기, 상품 별칭
+        차이도 언급으로 인정하므로 결과는 calculate_confidence보다 높을 수 있습니다.
+        """
+        scoring = scoring or self.scoring
+        batch = list(batch)
+        results = [None] * len(batch)
+        
+        groups = {}  # id(blog_data) -> 같은 응답을 쓰는 batch 인덱스
+        for i, (blog_data, store_name, product) in enumerate(batch):
+            if not blog_data or 'items' not in blog_data:
+                results[i] = (0.0, "검색 결과 없음")
+            elif not blog_data['items']:
+                results[i] = (0.0, "관련 블로그 없음")
+            else:
+                groups.setdefault(id(blog_data), []).append(i)
+        
+        one_year_ago = datetime.now() - timedelta(days=scoring.recent_days)
+        recent_by_date = {}
+        
+        for indices in groups.values():
+            matcher = matcher_for([batch[i][1:] for i in indices], synonyms)
+            
+            hits = defaultdict(int)
+            recent_posts = 0
+            items = batch[indices[0]][0]['items']
+            for item in items:
+                # 제목과 본문 사이에 걸친 표기는 언급으로 보지 않도록 \0으로 구분
+                text = normalize_text(item.get('title', '') + '\0' + item.get('description', ''))
+                for key in matcher.find(text):
+                    hits[key] += 1
+                
+                postdate = item.get('postdate', '')
+                recent = recent_by_date.get(postdate)
+                if recent is None:
+                    parsed = parse_postdate(postdate)
+                    recent = recent_by_date[postdate] = parsed is not None and parsed > one_year_ago
+                recent_posts += recent
+            
+            total_count = len(items)
+            for i in indices:
+                _, store_name, product = batch[i]
+                confidence = 0
+                confidence += min(hits[('product', product)] / total_count, 1.0) * scoring.product_weight
+                confidence += min(hits[('store', store_name)] / total_count, 1.0) * scoring.store_weight
+                confidence += min(recent_posts / total_count, 1.0) * scoring.recent_weight
+                confidence += min(total_count / scoring.volume_target, 1.0) * scoring.volume_weight
+                results[i] = (confidence, self._confidence_status(confidence, product, scoring))
+        return results
+    
+    def rescore(self, places, product, scoring=None, max_workers=1):
+        """저장된 블로그 응답으로 신뢰도를 다시 계산해 (rescored, stale) 반환
+        
+        blog_store에서 밀려난 가게는 블로그 검색을 다시 불러 채웁니다. 응답 캐시에
+        남아 있으면 API를 호출하지 않습니다. 원본 목록은 바꾸지 않고 복사본을 반환하며,
+        확인 보류/생략된 가게는 그대로 둡니다. 응답을 다시 받지 못해 이전 점수로 남은
+        가게는 stale 목록으로 돌려줍니다.
+        """
+        scoring = scoring or self.scoring
+        products = list(product) if isinstance(product, (list, tuple)) else [product]
+        multi = isinstance(product, (list, tuple))
+        store = self.blog_store if self.blog_store is not None else {}
+        
+        rescored = [copy.copy(place) for place in places]
+        stored = []  # (place, blog_data)
+        missing = []
+        for place in rescored:
+            if multi:
+                blog_data = store.get((place['place_name'], None, MULTI_PRODUCT_DISPLAY))
+            else:
+                # 적응형으로 여러 페이지를 받았으면 합친 응답 사용
+                blog_data = store.get((place['place_name'], product, 'adaptive')) or store.get(
+                    (place['place_name'], product, 10)
+                )
+            if blog_data is not None:
+                stored.append((place, blog_data))
+            elif place['status'] not in (QUOTA_DEFERRED_STATUS, SKIPPED_STATUS):
+                missing.append(place)
+        
+        stale = []
+        if missing:
+            def refetch(place):
+                try:
+                    if multi:
+                        return self.search_blogs_naver(place['place_name'], display=MULTI_PRODUCT_DISPLAY)
+                    if self.adaptive:
+                        return self.search_blogs_adaptive(place['place_name'], product, scoring)
+                    return self.search_blogs_naver(place['place_name'], product)
+                except QuotaExceededError:
+                    return None
+            
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    fetched = list(executor.map(refetch, missing))
+            else:
+                fetched = [refetch(place) for place in missing]
+            for place, blog_data in zip(missing, fetched):
+                # 오류로 빈 응답이 오면 "검색 결과 없음"으로 덮지 않고 이전 점수 유지
+                if blog_data:
+                    stored.append((place, blog_data))
+                else:
+                    stale.append(place)
+        if not stored:
+            return rescored, stale
+        
+        score_batch = self.calculate_confidence_matched if self.text_matching else self.calculate_confidence_batch
+        scores = {
+            name: score_batch(
+                [(blog_data, place['place_name'], name) for place, blog_data in stored], scoring
+            )
+            for name in products
+        }
+        for k, (place, blog_data) in enumerate(stored):
+            if multi:
+                place['product_confidences'] = {name: scores[name][k][0] for name in products}
+                place['product_statuses'] = {name: scores[name][k][1] for name in products}
+                best_product = max(products, key=lambda name: scores[name][k][0])
+                place['confidence'], place['status'] = scores[best_product][k]
+            else:
+                place['confidence'], place['status'] = scores[product][k]
+        return rescored, stale
+    
+    def verify_place(self, place, product):
+        """가게 하나의 블로그 검색 및 신뢰도 계산 (adaptive면 필요한 만큼 더 받음)
+        
+        네이버 할당량이 떨어지면 점수를 매기지 않고 확인 보류(QUOTA_DEFERRED_STATUS)로,
+        블로그 검색이 실패하면 FETCH_FAILED_STATUS로 표시합니다.
+        """
+        try:
+            if self.adaptive:
+                blog_data = self.search_blogs_adaptive(place['place_name'], product)
+                if self.blog_store is not None and blog_data:
+                    self.blog_store.put((place['place_name'], product, 'adaptive'), blog_data)
+            else:
+                blog_data = self.search_blogs_naver(place['place_name'], product)
+        except QuotaExceededError:
+            self._mark_unverified(place, QUOTA_DEFERRED_STATUS)
+            return place
+        if not blog_data:
+            self._mark_unverified(place, FETCH_FAILED_STATUS)
+            return place
+        
+        with self.metrics.phase("scoring"):
+            if self.text_matching:
+                confidence, status = self.calculate_confidence_matched([(blog_data, place['place_name'], product)])[0]
+            else:
+                confidence, status = self.calculate_confidence(
+                    blog_data, place['place_name'], product
+                )
+        
+        place['confidence'] = confidence
+        place['status'] = status
+        place['blog_count'] = len(blog_data.get('items', []))
+        return place
+    
+    def verify_place_products(self, place, products, display=MULTI_PRODUCT_DISPLAY):
+        """가게 하나의 블로그 글을 한 번만 가져와 여러 상품의 신뢰도를 함께 계산
+        
+        상품마다 따로 검색하지 않고 가게명만으로 더 많은 글(display개)을 받은 뒤,
+        같은 글 목록으로 상품별 점수를 매깁니다. 가장 높은 상품의 점수와 상태를
+        가게의 confidence/status로 사용합니다.
+        """
+        try:
+            blog_data = self.search_blogs_naver(place['place_name'], display=display)
+        except QuotaExceededError:
+            self._mark_unverified(place, QUOTA_DEFERRED_STATUS)
+            return place
+        if not blog_data:
+            self._mark_unverified(place, FETCH_FAILED_STATUS)
+            return place
+        
+        with self.metrics.phase("scoring"):
+            if self.text_matching:
+                # 모든 상품을 한 매처로 찾아 글마다 한 번만 정규화
+                matched = self.calculate_confidence_matched(
+                    [(blog_data, place['place_name'], product) for product in products]
+                )
+                scores = dict(zip(products, matched))
+            else:
+                scores = {
+                    product: self.calculate_confidence(blog_data, place['place_name'], product)
+                    for product in products
+                }
+        best_product = max(products, key=lambda product: scores[product][0])
+        
+        place['product_confidences'] = {product: score[0] for product, score in scores.items()}
+        place['product_statuses'] = {product: score[1] for product, score in scores.items()}
+        place['confidence'], place['status'] = scores[best_product]
+        place['blog_count'] = len(blog_data.get('items', []))
+        return place
+    
+    def verify_places(self, places, product, max_workers=1, on_progress=None, thread_initializer=None,
+                      should_stop=None):
+        """여러 가게의 판매 정보 확인
+        
+        max_workers가 1이면 기존처럼 순차 실행하고, 그보다 크면 스레드 풀에서
+        최대 max_workers개의 네이버 요청을 동시에 보냅니다. 신뢰도는 응답이 오는
+        즉시 계산되며, 반환 순서는 실행 방식과 관계없이 입력 순서와 같습니다.
+        
+        places는 리스트뿐 아니라 iter_places_kakao 같은 제너레이터도 받을 수 있으며,
+        이 경우 다음 페이지를 받는 동안 이미 받은 가게의 검증이 진행됩니다.
+        on_progress(완료 수, 전체 수, 입력 순번, place)는 호출한 스레드에서 실행되며,
+        전체 수를 아직 모르면 None이 전달됩니다.
+        
+        should_stop()이 참을 반환하면 새 확인을 시작하지 않습니다. 아직 시작하지 않은
+        요청과 남은 가게는 확인 생략 상태로 반환하므로 결과에서 빠지는 가게는 없습니다.
+        
+        product에 상품 목록(list/tuple)을 넘기면 verify_place_products로 가게마다
+        한 번의 검색으로 모든 상품을 확인합니다.
+        
+        cancel_event가 설정되면(또는 화면 갱신 등으로 호출한 쪽이 중단되면) 시작 전인
+        확인은 취소하고 진행 중인 확인은 새 호출 없이 끝나게 한 뒤 SearchCancelled(또는
+        원래 예외)를 전달합니다. 이미 받은 응답은 캐시와 blog_store에 남습니다.
+        """
+        total = len(places) if hasattr(places, '__len__') else None
+        verify = self.verify_place_products if isinstance(product, (list, tuple)) else self.verify_place
+        # 중단 후 남은 가게를 이어서 읽을 수 있도록 하나의 iterator로 순회
+        places = iter(places)
+        
+        if max_workers <= 1:
+            results = []
+            for place in places:
+                self.check_cancelled()
+                results.append(verify(place, product))
+                if self.rate_limiter is None:
+                    time.sleep(0.1)  # API 호출 제한 방지
+                if on_progress:
+                    on_progress(len(results), total, len(results) - 1, place)
+                if should_stop and should_stop():
+                    break
+            results.extend(self._skip_remaining(places))
+            return results
+        
+        results = []
+        pending = {}
+        done_count = 0
+        stopped = False
+        
+        def collect(futures):
+            nonlocal done_count, stopped
+            for future in futures:
+                i = pending.pop(future)
+                results[i] = future.result()
+                done_count += 1
+                if on_progress:
+                    on_progress(done_count, total, i, results[i])
+                if should_stop and should_stop():
+                    stopped = True
+                    return
+        
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=thread_initializer) as executor:
+            try:
+                for place in places:
+                    self.check_cancelled()
+                    pending[executor.submit(verify, place, product)] = len(results)
+                    results.append(place)
+                    # 다음 가게를 기다리는 동안 끝난 작업부터 반영
+                    collect([future for future in pending if future.done()])
+                    if stopped:
+                        break
+                
+                if not stopped:
+                    total = len(results)
+                    collect(as_completed(list(pending)))
+            except BaseException:
+                # 취소/중단: 시작 전인 확인은 버리고, 진행 중인 확인은 다음 호출 전에 멈추게 함
+                if self.cancel_event is not None:
+                    self.cancel_event.set()
+                for future in pending:
+                    future.cancel()
+                raise
+            
+            # 중단된 경우 시작 전인 요청은 취소, 이미 진행 중인 요청은 끝나면 결과 사용
+            for future, i in pending.items():
+                if future.cancel():
+                    self._mark_unverified(results[i], SKIPPED_STATUS)
+        
+        for future, i in pending.items():
+            if not future.cancelled():
+                results[i] = future.result()
+        if stopped:
+            results.extend(self._skip_remaining(places))
+        return results
+    
+    def _skip_remaining(self, places):
+        """조기 종료 후 아직 읽지 않은 가게를 확인 생략 상태로 반환"""
+        skipped = []
+        for place in places:
+            self.check_cancelled()
+            self._mark_unverified(place, SKIPPED_STATUS)
+            skipped.append(place)
+        return skipped
+    
+    def _mark_unverified(self, place, status):
+        """확인하지 않은 가게 표시 (신뢰도 0, 블로그 0건)"""
+        place['confidence'] = 0.0
+        place['status'] = status
+        place['blog_count'] = 0
+    
+    def rank_for_budget(self, places, budget):
+        """남은 호출 수(budget) 안에서 검증할 가게 선택
+        
+        카카오 distance가 가까운 가게부터 고르고(거리 정보가 없으면 검색 결과 순서),
+        나머지는 확인 보류 상태로 표시해 (selected, deferred)로 반환합니다.
+        """
+        def distance(place):
+            value = place.get('distance', '')
+            return int(value) if str(value).isdigit() else float('inf')
+        
+        ranked = sorted(places, key=distance)
+        selected, deferred = ranked[:budget], ranked[budget:]
+        for place in deferred:
+            self._mark_unverified(place, QUOTA_DEFERRED_STATUS)
+        return selected, deferred
+    
+    def create_map(self, places_with_confidence, center_lat=37.5665, center_lng=126.9780, scoring=None):
+        """Folium 지도 생성"""
+        import folium
+        
+        scoring = scoring or self.scoring        
+        m = folium.Map(
+            location=[center_lat, center_lng],
+            zoom_start=12,
+            tiles='OpenStreetMap'
+        )
+        
+        for place in places_with_confidence:
+            lat = float(place['y'])
+            lng = float(place['x'])
+            confidence = place['confidence']
+            
+            # 신뢰도에 따른 마커 색상
+            color, icon = MARKER_STYLES[scoring.level(confidence)]
+            
+            # 팝업 내용
+            popup_content = f"""
+            <div style="width:200px">
+                <h4>{place['place_name']}</h4>
+                <p><strong>주소:</strong> {place.get('address_name', '정보없음')}</p>
+                <p><strong>전화:</strong> {place.get('phone', '정보없음')}</p>
+                <p><strong>신뢰도:</strong> {confidence:.1%}</p>
+                <p><strong>상태:</strong> {place['status']}</p>
+            </div>
+            """
+            
+            folium.Marker(
+                [lat, lng],
+                popup=folium.Popup(popup_content, max_width=300),
+                tooltip=place['place_name'],
+                icon=folium.Icon(color=color, icon=icon)
+            ).add_to(m)
+        
+        return m
+    
+    def create_cluster_map(self, places_with_confidence, center_lat=37.5665, center_lng=126.9780, scoring=None):
+        """마커가 많을 때 쓰는 클러스터 지도 생성
+        
+        가게마다 Marker 객체를 만드는 대신 좌표와 팝업 내용을 하나의 배열로 넘기고,
+        브라우저에서 FastMarkerCluster가 마커를 만들고 묶어 수천 개도 가볍게 표시합니다.
+        """
+        import folium
+        from folium.plugins import FastMarkerCluster
+        
+        scoring = scoring or self.scoring
+        m = folium.Map(
+            location=[center_lat, center_lng],
+            zoom_start=12,
+            tiles='OpenStreetMap'
+        )
+        
+        rows = []
+        for place in places_with_confidence:
+            popup_content = (
+                '<div style="width:200px">'
+                f"<h4>{html.escape(place['place_name'])}</h4>"
+                f"<p><strong>주소:</strong> {html.escape(place.get('address_name') or '정보없음')}</p>"
+                f"<p><strong>전화:</strong> {html.escape(place.get('phone') or '정보없음')}</p>"
+                f"<p><strong>신뢰도:</strong> {place['confidence']:.1%}</p>"
+                f"<p><strong>상태:</strong> {html.escape(place['status'])}</p>"
+                '</div>'
+            )
+            rows.append([
+                float(place['y']), float(place['x']), scoring.level(place['confidence']),
+                popup_content, place['place_name']
+            ])
+        
+        FastMarkerCluster(rows, callback=CLUSTER_MARKER_CALLBACK).add_to(m)
+        
+        if rows:
+            lats = [row[0] for row in rows]
+            lngs = [row[1] for row in rows]
+            m.fit_bounds([[min(lats), min(lngs)], [max(lats), max(lngs)]])
+        return m
+
+# 인기 검색 미리 준비 설정
+PREFETCH_DB_PATH = os.environ.get("PRODUCT_FINDER_PREFETCH_DB", os.path.join(".cache", "prefetch_index.sqlite3"))
+PREFETCH_QUERIES_PATH = os.environ.get("PRODUCT_FINDER_PREFETCH_QUERIES", "prefetch_queries.jsonl")
+PREFETCH_INTERVAL = float(os.environ.get("PRODUCT_FINDER_PREFETCH_INTERVAL", 24 * 3600))  # 갱신 주기 (초)
+PREFETCH_MAX_AGE = 2 * 24 * 3600  # 이보다 오래된 결과는 사용하지 않음 (초)
+PREFETCH_MAX_PLACES = 45
+PREFETCH_NAVER_RESERVE = 5000  # 실시간 검색을 위해 남겨 둘 네이버 할당량
+
+
+def load_prefetch_queries(path=PREFETCH_QUERIES_PATH):
+    """미리 준비할 (location, category, product) 목록을 JSONL 파일에서 읽기 (파일이 없으면 빈 목록)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [
+            {key: row[key].strip() for key in ("location", "category", "product")}
+            for row in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+class ResultIndex:
+    """미리 계산한 검색 결과를 (위치, 카테고리, 상품)으로 찾는 SQLite 저장소
+    
+    결과는 장소 검색 순서대로 저장하므로 max_places만큼 잘라 쓰면 같은 조건의
+    실시간 검색과 같은 가게 목록이 됩니다.
+    """
+    
+    def __init__(self, path=PREFETCH_DB_PATH, max_age=PREFETCH_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_results (
+                key TEXT PRIMARY KEY,
+                location TEXT NOT NULL,
+                category TEXT NOT NULL,
+                product TEXT NOT NULL,
+                places TEXT NOT NULL,
+                refreshed_at REAL NOT NULL
+            )
+        """)
+    
+    @staticmethod
+    def make_key(location, category, product):
+        """검색 조건 정규화: 공백 정리 및 소문자화"""
+        return "\x1f".join(" ".join(value.split()).lower() for value in (location, category, product))
+    
+    def get(self, location, category, product):
+        """저장된 (장소 목록, 갱신 시각) 또는 없거나 너무 오래되었으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT places, refreshed_at FROM search_results WHERE key = ?",
+                (self.make_key(location, category, product),)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return json.loads(row[0]), datetime.fromtimestamp(row[1], KST)
+    
+    def age(self, location, category, product):
+        """저장된 결과가 갱신된 지 몇 초 지났는지 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM search_results WHERE key = ?",
+                (self.make_key(location, category, product),)
+            ).fetchone()
+        return None if row is None else time.time() - row[0]
+    
+    def put(self, location, category, product, places):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?, ?)",
+                (self.make_key(location, category, product), location, category, product,
+                 json.dumps(places, ensure_ascii=False), time.time())
+            )
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+
+
+class Prefetcher:
+    """인기 검색 조합을 주기적으로 미리 검색해 ResultIndex에 저장하는 백그라운드 작업
+    
+    갱신 주기가 지나지 않은 조합은 건너뛰고, 네이버 남은 할당량이 reserve 이하로
+    떨어질 만큼이면 이번 회차를 멈춰 실시간 검색에 쓸 할당량을 남겨 둡니다.
+    """
+    
+    def __init__(self, finder, index, queries, interval=PREFETCH_INTERVAL,
+                 max_places=PREFETCH_MAX_PLACES, reserve=PREFETCH_NAVER_RESERVE, max_workers=2):
+        self.finder = finder
+        self.index = index
+        self.queries = queries
+        self.interval = interval
+        self.max_places = max_places
+        self.reserve = reserve
+        self.max_workers = max_workers
+        self.last_run = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def has_quota(self):
+        limiter = self.finder.rate_limiter
+        if limiter is None:
+            return True
+        return (limiter.remaining("naver") >= self.max_places + self.reserve
+                and limiter.remaining("kakao") >= self.max_places)
+    
+    def run_once(self):
+        """오래된 조합을 한 번씩 갱신하고 갱신한 조합 수 반환"""
+        refreshed = 0
+        for query in self.queries:
+            if self._stop.is_set():
+                break
+            age = self.index.age(query["location"], query["category"], query["product"])
+            if age is not None and age < self.interval:
+                continue
+            if not self.has_quota():
+                logger.warning("할당량이 부족해 미리 검색을 다음 회차로 미룹니다.")
+                break
+            
+            places = list(self.finder.iter_places_kakao(
+                query["location"], query["category"], max_results=self.max_places
+            ))
+            if not places:
+                continue
+            verified = self.finder.verify_places(places, query["product"], max_workers=self.max_workers)
+            if any(place['status'] == QUOTA_DEFERRED_STATUS for place in verified):
+                logger.warning("할당량이 떨어져 확인하지 못한 가게가 있어 미리 검색을 다음 회차로 미룹니다.")
+                break
+            if any(place['status'] == FETCH_FAILED_STATUS for place in verified):
+                # 장애 중의 결과로 덮어쓰지 않고 이전 결과를 유지
+                logger.warning("블로그 검색 오류로 확인하지 못한 가게가 있어 %s 조합은 갱신하지 않습니다.", query)
+                continue
+            self.index.put(query["location"], query["category"], query["product"], verified)
+            refreshed += 1
+        
+        self.last_run = datetime.now(KST)
+        return refreshed
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("미리 검색 중 오류")
+            # 다음 조합이 오래되는 시점을 놓치지 않도록 주기보다 자주 확인
+            self._stop.wait(min(self.interval, 3600))
+    
+    def start(self):
+        """백그라운드 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._thread is None and self.queries:
+                self._thread = threading.Thread(target=self._run, name="prefetcher", daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
@@ -1,249 +1,353 @@
 import streamlit as st
-import requests
-import json
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import os
 import time
-import pandas as pd
-import folium
-from streamlit_folium import st_folium
-import re
-from datetime import datetime, timedelta
-import urllib.parse
+import itertools
+import threading
+from datetime import datetime
 
-# 페이지 설정
-st.set_page_config(
-    page_title="🍯 지역 특산품 찾기",
-    page_icon="🍯",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from product_finder_core import (
+    ADAPTIVE_ITEM_BUDGET,
+    ADAPTIVE_PAGE_SIZE,
+    CLUSTER_MARKER_THRESHOLD,
+    DEFAULT_SCORING,
+    KAKAO_MAX_PAGE_SIZE,
+    HttpClient,
+    JobRegistry,
+    LocalProductFinder,
+    Metrics,
+    Prefetcher,
+    RateLimiter,
+    ResponseCache,
+    ResultIndex,
+    ScoringConfig,
+    SearchCancelled,
+    SingleFlight,
+    SpatialIndex,
+    StageStore,
+    TopKRanking,
+    compact_results,
+    load_prefetch_queries,
+    result_fingerprint,
+    viewport_too_large,
 )
 
-# CSS 스타일링
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        background: linear-gradient(90deg, #667eea, #764ba2);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-size: 3rem;
-        font-weight: bold;
-        margin-bottom: 0.5rem;
-    }
-    .sub-header {
-        text-align: center;
-        color: #666;
-        font-size: 1.2rem;
-        margin-bottom: 2rem;
-    }
-    .store-card {
-        border: 1px solid #ddd;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        background: white;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .store-name {
-        font-size: 1.1rem;
-        font-weight: bold;
-        color: #333;
-    }
-    .store-info {
-        color: #666;
-        font-size: 0.9rem;
-        margin: 0.3rem 0;
-    }
-    .confidence-high {
-        background: #d4edda;
-        color: #155724;
-        padding: 0.2rem 0.5rem;
-        border-radius: 15px;
-        font-size: 0.8rem;
-        font-weight: bold;
-    }
-    .confidence-medium {
-        background: #fff3cd;
-        color: #856404;
-        padding: 0.2rem 0.5rem;
-        border-radius: 15px;
-        font-size: 0.8rem;
-        font-weight: bold;
-    }
-    .confidence-low {
-        background: #f8d7da;
-        color: #721c24;
-        padding: 0.2rem 0.5rem;
-        border-radius: 15px;
-        font-size: 0.8rem;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
+# pandas, folium, streamlit_folium은 불러오는 데 시간이 오래 걸리므로
+# 결과 표/지도를 실제로 그릴 때 함수 안에서 불러옵니다.
 
-class LocalProductFinder:
-    def __init__(self):
-        self.kakao_api_key = None
-        self.naver_client_id = None
-        self.naver_client_secret = None
-        
-    def setup_apis(self, kakao_key, naver_id, naver_secret):
-        """API 키 설정"""
-        self.kakao_api_key = kakao_key
-        self.naver_client_id = naver_id
-        self.naver_client_secret = naver_secret
-        
-    def search_places_kakao(self, location, category, size=15):
-        """카카오 맵 API로 장소 검색"""
-        if not self.kakao_api_key:
-            return []
-            
-        url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-        headers = {"Authorization": f"KakaoAK {self.kakao_api_key}"}
-        params = {
-            "query": f"{location} {category}",
-            "size": size
-        }
+@st.cache_resource
+def get_response_cache():
+    """프로세스 전체에서 공유하는 API 응답 캐시"""
+    return ResponseCache()
+
+# 지도 마커 색상과 결과 카드 스타일 (신뢰도 높음/보통/낮음)
+LIVE_MARKER_COLORS = ("#2e7d32", "#f57c00", "#c62828")
+CONFIDENCE_CLASSES = ("confidence-high", "confidence-medium", "confidence-low")
+
+# 세션마다 보관할 단계별 원본 개수 (장소 목록, 가게별 블로그 응답)
+# 블로그 응답은 프로세스 공용 응답 캐시에도 있으므로 최근 검색 두어 번 분량만 보관
+PLACE_STAGE_ENTRIES = 20
+BLOG_STAGE_ENTRIES = 100
+
+def render_live_results(placeholder, ranking, verified, product, scoring):
+    """검색 중 지금까지 확인된 결과의 상위 k개와 지도 표시"""
+    import pandas as pd
+    
+    with placeholder.container():
+        st.markdown(f"#### ⏱️ 지금까지 확인한 {len(verified)}곳 중 '{product}' 상위 결과")
+        for rank, place in enumerate(ranking.ranked(), start=1):
+            st.markdown(f"{rank}. **{place['place_name']}** · 신뢰도 {place['confidence']:.1%} · {place['status']}")
         
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data.get('documents', [])
-        except requests.RequestException as e:
-            st.error(f"장소 검색 중 오류 발생: {e}")
-            return []
-    
-    def search_blogs_naver(self, store_name, product, display=10):
-        """네이버 블로그 검색 API"""
-        if not self.naver_client_id or not self.naver_client_secret:
-            return {}
-            
-        url = "https://openapi.naver.com/v1/search/blog.json"
-        headers = {
-            "X-Naver-Client-Id": self.naver_client_id,
-            "X-Naver-Client-Secret": self.naver_client_secret
+        st.map(
+            pd.DataFrame({
+                'lat': [float(place['y']) for place in verified],
+                'lon': [float(place['x']) for place in verified],
+                'color': [LIVE_MARKER_COLORS[scoring.level(place['confidence'])] for place in verified],
+            }),
+            latitude='lat',
+            longitude='lon',
+            color='color',
+            height=300
+        )
+
+@st.cache_resource(max_entries=32)
+def get_result_map(fingerprint, scoring, _finder, _places, center_lat, center_lng):
+    """검색 결과 지문과 신뢰도 기준별로 한 번만 만드는 개별 마커 지도"""
+    with get_metrics().phase("map_build"):
+        return _finder.create_map(_places, center_lat, center_lng, scoring)
+
+@st.cache_resource(max_entries=32)
+def get_cluster_map_html(fingerprint, scoring, _finder, _places, center_lat, center_lng):
+    """검색 결과 지문과 신뢰도 기준별로 한 번만 만들고 직렬화하는 클러스터 지도 HTML"""
+    with get_metrics().phase("map_build"):
+        return _finder.create_cluster_map(_places, center_lat, center_lng, scoring).get_root().render()
+
+def viewport_from_map_state(map_state):
+    """st_folium이 돌려준 지도 영역을 (남, 서, 북, 동)으로 변환 (작은 흔들림은 무시하도록 반올림)"""
+    bounds = (map_state or {}).get('bounds') or {}
+    south_west, north_east = bounds.get('_southWest') or {}, bounds.get('_northEast') or {}
+    values = (south_west.get('lat'), south_west.get('lng'), north_east.get('lat'), north_east.get('lng'))
+    if any(value is None for value in values):
+        return None
+    return tuple(round(value, 4) for value in values)
+
+def confidence_filters(scoring):
+    """상세 결과 탭의 신뢰도 필터 (전체, 높음, 보통, 낮음)"""
+    return [
+        "전체",
+        f"높음 ({scoring.high_threshold:.0%} 이상)",
+        f"보통 ({scoring.medium_threshold:.0%} 이상)",
+        f"낮음 ({scoring.medium_threshold:.0%} 미만)",
+    ]
+
+@st.cache_resource(max_entries=32)
+def build_result_views(fingerprint, scoring, _places):
+    """검색 결과 지문별로 한 번만 계산하는 요약 수치, 필터 결과, 데이터 표와 CSV
+    
+    rerun마다 같은 객체를 그대로 돌려주므로 호출하는 쪽에서 수정하면 안 됩니다.
+    """
+    with get_metrics().phase("table_build"):
+        return _build_result_views(_places, scoring)
+
+def _build_result_views(_places, scoring):
+    import pandas as pd
+    
+    confidences = [place.confidence for place in _places]
+    
+    df = pd.DataFrame([
+        {
+            '순위': i + 1,
+            '가게명': place.place_name,
+            '주소': place.address_name,
+            '전화번호': place.get('phone', '정보없음'),
+            '블로그 언급': f"{place.blog_count}회",
+            '신뢰도': f"{place.confidence:.1%}",
+            '상태': place.status.replace('✅', '').replace('⚠️', '').replace('❓', '').strip(),
+            # 여러 상품 검색이면 상품별 신뢰도 열 추가
+            **{
+                f"{product} 신뢰도": f"{confidence:.1%}"
+                for product, confidence in (place.product_confidences or {}).items()
+            }
         }
-        params = {
-            "query": f"{store_name} {product}",
-            "display": display,
-            "sort": "date"
+        for i, place in enumerate(_places)
+    ])
+    
+    # 가게 × 상품 신뢰도 행렬 (여러 상품 검색일 때만)
+    matrix = None
+    if any(place.product_confidences for place in _places):
+        matrix = pd.DataFrame([
+            {'가게명': place.place_name, **(place.product_confidences or {})}
+            for place in _places
+        ])
+    
+    high, medium = scoring.high_threshold, scoring.medium_threshold
+    all_label, high_label, medium_label, low_label = confidence_filters(scoring)
+    return {
+        'total': len(_places),
+        'high': sum(1 for c in confidences if c >= high),
+        'medium': sum(1 for c in confidences if c >= medium),
+        'filtered': {
+            all_label: list(range(len(_places))),
+            high_label: [i for i, c in enumerate(confidences) if c >= high],
+            medium_label: [i for i, c in enumerate(confidences) if c >= medium],
+            low_label: [i for i, c in enumerate(confidences) if c < medium],
+        },
+        'dataframe': df,
+        'matrix': matrix,
+        'csv': df.to_csv(index=False).encode('utf-8-sig'),
+    }
+
+@st.cache_resource
+def get_display_finder():
+    """결과 표시(지도 생성)에 쓰는 finder - API 키가 필요 없어 한 번만 생성"""
+    return LocalProductFinder(cache=get_response_cache(), http=get_http_client())
+
+@st.cache_resource
+def get_metrics():
+    """프로세스 전체 계측 (PRODUCT_FINDER_METRICS=1이면 시작부터 켜짐)"""
+    return Metrics(enabled=os.environ.get("PRODUCT_FINDER_METRICS") == "1")
+
+def render_debug_panel(metrics):
+    """사이드바 성능 디버그 패널"""
+    import pandas as pd
+    
+    with st.sidebar.expander("🐞 성능 디버그", expanded=True):
+        # 마지막 검색 시작 이후의 증가분 (지도/표 생성 포함)
+        baseline = st.session_state.get('search_phase_baseline', {})
+        last_phases = {
+            name: (seconds - baseline.get(name, (0, 0))[0], count - baseline.get(name, (0, 0))[1])
+            for name, (seconds, count) in metrics.phase_totals().items()
+            if count != baseline.get(name, (0, 0))[1]
         }
+        if last_phases:
+            st.markdown("**마지막 검색 이후 단계별 시간**")
+            st.dataframe(
+                pd.DataFrame([
+                    {'단계': name, '누적(ms)': round(seconds * 1000, 1), '횟수': count}
+                    for name, (seconds, count) in last_phases.items()
+                ]),
+                hide_index=True
+            )
         
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data
-        except requests.RequestException as e:
-            st.error(f"블로그 검색 중 오류 발생: {e}")
-            return {}
-    
-    def calculate_confidence(self, blog_data, store_name, product):
-        """신뢰도 계산"""
-        if not blog_data or 'items' not in blog_data:
-            return 0.0, "검색 결과 없음"
-        
-        items = blog_data['items']
-        total_count = len(items)
-        
-        if total_count == 0:
-            return 0.0, "관련 블로그 없음"
-        
-        # 점수 계산 요소들
-        product_mentions = 0
-        store_mentions = 0
-        recent_posts = 0
-        
-        # 최근 1년 기준
-        one_year_ago = datetime.now() - timedelta(days=365)
-        
-        for item in items:
-            title = item.get('title', '').lower()
-            description = item.get('description', '').lower()
-            
-            # HTML 태그 제거
-            title = re.sub('<.*?>', '', title)
-            description = re.sub('<.*?>', '', description)
-            
-            # 상품명 언급 확인
-            if product.lower() in title or product.lower() in description:
-                product_mentions += 1
-            
-            # 가게명 언급 확인
-            if store_name.lower() in title or store_name.lower() in description:
-                store_mentions += 1
-            
-            # 최근 게시물 확인 (날짜 파싱)
-            try:
-                post_date = datetime.strptime(item.get('postdate', ''), '%Y%m%d')
-                if post_date > one_year_ago:
-                    recent_posts += 1
-            except:
-                pass
-        
-        # 신뢰도 계산 (0-1 범위)
-        confidence = 0
-        confidence += min(product_mentions / total_count, 1.0) * 0.5  # 상품 언급률 (50%)
-        confidence += min(store_mentions / total_count, 1.0) * 0.2    # 가게 언급률 (20%)
-        confidence += min(recent_posts / total_count, 1.0) * 0.2      # 최근 게시물 비율 (20%)
-        confidence += min(total_count / 10, 1.0) * 0.1               # 전체 게시물 수 (10%)
-        
-        # 상태 메시지
-        if confidence >= 0.7:
-            status = f"✅ {product} 판매 가능성 높음"
-        elif confidence >= 0.4:
-            status = f"⚠️ {product} 판매 가능성 보통"
-        else:
-            status = f"❓ {product} 판매 정보 부족"
+        http = get_http_client()
+        cache_stats = get_response_cache().stats()
+        for api in sorted(metrics.latency_count):
+            # 호출이 모두 실패했으면 응답 시간 표본이 없어 p95도 없음
+            p95 = http.latency.percentile(api, 95, min_samples=1)
+            p95_text = f"{p95 * 1000:.0f}ms" if p95 is not None else "-"
+            st.caption(
+                f"{api}: 호출 {metrics.latency_count[api]}회 · 평균 "
+                f"{metrics.latency_sum[api] / metrics.latency_count[api] * 1000:.0f}ms · "
+                f"p95 {p95_text} · 재시도 {http.retries[api]}회"
+            )
+        st.caption(f"상태 코드: {dict((f'{api} {code}', n) for (api, code), n in metrics.status_codes.items())}")
+        st.caption(f"캐시 적중률: {cache_stats['hit_ratio']:.1%}")
         
-        return confidence, status
-    
-    def create_map(self, places_with_confidence, center_lat=37.5665, center_lng=126.9780):
-        """Folium 지도 생성"""
-        m = folium.Map(
-            location=[center_lat, center_lng],
-            zoom_start=12,
-            tiles='OpenStreetMap'
+        prometheus_text = metrics.to_prometheus(
+            http=http, cache=get_response_cache(), single_flight=get_single_flight()
         )
-        
-        for place in places_with_confidence:
-            lat = float(place['y'])
-            lng = float(place['x'])
-            confidence = place['confidence']
-            
-            # 신뢰도에 따른 마커 색상
-            if confidence >= 0.7:
-                color = 'green'
-                icon = 'star'
-            elif confidence >= 0.4:
-                color = 'orange'  
-                icon = 'info-sign'
-            else:
-                color = 'red'
-                icon = 'question-sign'
-            
-            # 팝업 내용
-            popup_content = f"""
-            <div style="width:200px">
-                <h4>{place['place_name']}</h4>
-                <p><strong>주소:</strong> {place['address_name']}</p>
-                <p><strong>전화:</strong> {place.get('phone', '정보없음')}</p>
-                <p><strong>신뢰도:</strong> {confidence:.1%}</p>
-                <p><strong>상태:</strong> {place['status']}</p>
-            </div>
-            """
-            
-            folium.Marker(
-                [lat, lng],
-                popup=folium.Popup(popup_content, max_width=300),
-                tooltip=place['place_name'],
-                icon=folium.Icon(color=color, icon=icon)
-            ).add_to(m)
-        
-        return m
+        st.download_button("📈 Prometheus 형식 내보내기", prometheus_text, file_name="product_finder_metrics.prom",
+                           mime="text/plain", key="download_metrics")
+
+@st.cache_resource
+def get_single_flight():
+    """세션 사이에서 동시에 들어온 같은 API 요청을 합치는 single-flight"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_rate_limiter():
+    """프로세스 전체에서 공유하는 API 호출 제한/할당량 관리자"""
+    return RateLimiter()
+
+@st.cache_resource
+def get_http_client():
+    """rerun과 세션 사이에서 재사용하는 keep-alive HTTP 클라이언트"""
+    return HttpClient(metrics=get_metrics())
+
+@st.cache_resource
+def get_job_registry():
+    """세션별로 진행 중인 검색 작업 (새 검색/세션 종료 시 이전 작업의 남은 호출 취소)"""
+    return JobRegistry()
+
+def is_session_active(session_id):
+    """Streamlit 런타임에 아직 연결된 세션인지"""
+    from streamlit import runtime
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+@st.cache_resource
+def get_result_index():
+    """미리 계산한 인기 검색 결과 저장소"""
+    return ResultIndex()
+
+def get_server_api_keys():
+    """서버에 설정된 API 키 (Secrets, 없으면 환경 변수) - 하나라도 없으면 None"""
+    try:
+        secrets = st.secrets["api_keys"]
+        keys = (secrets["kakao_rest_api"], secrets["naver_client_id"], secrets["naver_client_secret"])
+    except Exception:
+        keys = (
+            os.environ.get("KAKAO_REST_API_KEY"),
+            os.environ.get("NAVER_CLIENT_ID"),
+            os.environ.get("NAVER_CLIENT_SECRET"),
+        )
+    return keys if all(keys) else None
+
+@st.cache_resource
+def get_prefetcher():
+    """프로세스에 하나만 실행되는 인기 검색 미리 준비 작업
+    
+    사용자가 입력한 키로는 실행하지 않고 서버에 설정된 키로만 호출합니다. 키가 없으면 None.
+    """
+    api_keys = get_server_api_keys()
+    if api_keys is None:
+        return None
+    
+    finder = LocalProductFinder(
+        cache=get_response_cache(),
+        http=get_http_client(),
+        rate_limiter=get_rate_limiter(),
+        single_flight=get_single_flight(),
+        metrics=get_metrics()
+    )
+    finder.setup_apis(*api_keys)
+    prefetcher = Prefetcher(finder, get_result_index(), load_prefetch_queries())
+    prefetcher.start()
+    return prefetcher
 
 # 메인 앱
 def main():
+    # 페이지 설정
+    st.set_page_config(
+        page_title="🍯 지역 특산품 찾기",
+        page_icon="🍯",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # CSS 스타일링
+    st.markdown("""
+    <style>
+        .main-header {
+            text-align: center;
+            background: linear-gradient(90deg, #667eea, #764ba2);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            font-size: 3rem;
+            font-weight: bold;
+            margin-bottom: 0.5rem;
+        }
+        .sub-header {
+            text-align: center;
+            color: #666;
+            font-size: 1.2rem;
+            margin-bottom: 2rem;
+        }
+        .store-card {
+            border: 1px solid #ddd;
+            border-radius: 10px;
+            padding: 1rem;
+            margin: 0.5rem 0;
+            background: white;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        .store-name {
+            font-size: 1.1rem;
+            font-weight: bold;
+            color: #333;
+        }
+        .store-info {
+            color: #666;
+            font-size: 0.9rem;
+            margin: 0.3rem 0;
+        }
+        .confidence-high {
+            background: #d4edda;
+            color: #155724;
+            padding: 0.2rem 0.5rem;
+            border-radius: 15px;
+            font-size: 0.8rem;
+            font-weight: bold;
+        }
+        .confidence-medium {
+            background: #fff3cd;
+            color: #856404;
+            padding: 0.2rem 0.5rem;
+            border-radius: 15px;
+            font-size: 0.8rem;
+            font-weight: bold;
+        }
+        .confidence-low {
+            background: #f8d7da;
+            color: #721c24;
+            padding: 0.2rem 0.5rem;
+            border-radius: 15px;
+            font-size: 0.8rem;
+            font-weight: bold;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+    
     # 헤더
     st.markdown('<h1 class="main-header">🍯 지역 특산품 찾기</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">원하는 특산품을 판매하는 가게를 똑똑하게 찾아보세요!</p>', unsafe_allow_html=True)
@@ -325,6 +429,150 @@ naver_client_id = "여기에_네이버_클라이언트ID"
 naver_client_secret = "여기에_네이버_시크릿"
             """, language="toml")
     
+    # 검색 설정
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### ⚙️ 검색 설정")
+    max_workers = st.sidebar.slider(
+        "동시 확인 가게 수",
+        min_value=1,
+        max_value=10,
+        value=5,
+        help="네이버 블로그 검색을 동시에 몇 개까지 보낼지 설정합니다. 1이면 한 곳씩 순서대로 확인합니다."
+    )
+    
+    max_places = st.sidebar.slider(
+        "최대 가게 수",
+        min_value=KAKAO_MAX_PAGE_SIZE,
+        max_value=45,
+        value=KAKAO_MAX_PAGE_SIZE,
+        step=KAKAO_MAX_PAGE_SIZE,
+        help="카카오 검색 결과를 여러 페이지에 걸쳐 가져옵니다. 가게가 많은 지역에서 더 넓게 찾을 수 있습니다."
+    )
+    
+    progressive = st.sidebar.checkbox(
+        "확인되는 대로 결과 표시",
+        value=True,
+        help="모든 가게를 확인하기 전에도 지금까지의 상위 결과와 지도를 바로 보여줍니다."
+    )
+    
+    top_k = st.sidebar.number_input("우선 표시할 상위 가게 수", min_value=1, max_value=45, value=5)
+    
+    early_stop = st.sidebar.checkbox(
+        "상위 결과가 확정되면 나머지 생략",
+        value=False,
+        help="남은 가게가 현재 상위 결과를 넘어설 수 없으면 나머지 가게의 확인을 건너뜁니다. "
+             "아직 확인하지 않은 가게도 만점을 받을 수 있으므로, 상위 가게가 모두 만점일 때만 생략됩니다."
+    )
+    
+    adaptive_evidence = st.sidebar.checkbox(
+        "애매한 가게는 블로그 글 더 확인",
+        value=False,
+        help=f"블로그 글 {ADAPTIVE_PAGE_SIZE}개씩 받으며 신뢰도 등급이 통계적으로 정해지면 멈춥니다. "
+             f"가게당 최대 {ADAPTIVE_ITEM_BUDGET}개까지 확인합니다. (한 상품 검색에만 적용)"
+    )
+    
+    text_matching = st.sidebar.checkbox(
+        "띄어쓰기·지점명 차이 허용",
+        value=False,
+        help="'시루 떡'처럼 띄어 쓴 상품명, HTML 엔티티, 상품 별칭(예: 포기김치), "
+             "지점 표기를 뺀 가게명(예: 'OO떡집 강남점' → 'OO떡집')도 언급으로 인정합니다."
+    )
+    
+    map_mode = st.sidebar.selectbox(
+        "지도 마커 표시",
+        ["자동", "개별 마커", "클러스터"],
+        help=f"자동: 가게가 {CLUSTER_MARKER_THRESHOLD}곳을 넘으면 가까운 마커를 묶어서 표시합니다."
+    )
+    
+    viewport_search = st.sidebar.checkbox(
+        "지도를 움직이면 보이는 영역 검색",
+        value=False,
+        help="검색 후 지도를 옮기거나 확대/축소하면 화면에 보이는 영역의 가게를 다시 찾습니다. "
+             "영역을 격자 타일로 나눠 처음 보는 타일만 검색하므로, 이미 본 곳으로 돌아오면 API를 호출하지 않습니다."
+    )
+    
+    hedge_requests = st.sidebar.checkbox(
+        "느린 요청 재전송 (헤지)",
+        value=False,
+        help="응답이 최근 95% 응답 시간보다 늦어지면 같은 요청을 한 번 더 보내 먼저 온 응답을 사용합니다."
+    )
+    
+    # 신뢰도 계산 설정 (바꾸면 저장된 블로그 응답으로 바로 다시 계산)
+    with st.sidebar.expander("🎚️ 신뢰도 계산 설정"):
+        product_weight = st.slider("상품 언급률 가중치", 0.0, 1.0, DEFAULT_SCORING.product_weight, 0.05)
+        store_weight = st.slider("가게 언급률 가중치", 0.0, 1.0, DEFAULT_SCORING.store_weight, 0.05)
+        recent_weight = st.slider("최근 게시물 가중치", 0.0, 1.0, DEFAULT_SCORING.recent_weight, 0.05)
+        volume_weight = st.slider("게시물 수 가중치", 0.0, 1.0, DEFAULT_SCORING.volume_weight, 0.05)
+        medium_threshold, high_threshold = st.slider(
+            "보통 / 높음 기준",
+            0.0, 1.0,
+            (DEFAULT_SCORING.medium_threshold, DEFAULT_SCORING.high_threshold),
+            0.05,
+            help="신뢰도가 왼쪽 값 이상이면 '보통', 오른쪽 값 이상이면 '높음'으로 표시합니다."
+        )
+    scoring = ScoringConfig(
+        product_weight=product_weight,
+        store_weight=store_weight,
+        recent_weight=recent_weight,
+        volume_weight=volume_weight,
+        high_threshold=high_threshold,
+        medium_threshold=medium_threshold
+    )
+    
+    use_prefetched = st.sidebar.checkbox(
+        "미리 준비된 결과 사용",
+        value=True,
+        help="자주 찾는 검색 조합은 주기적으로 미리 검색해 둔 결과를 API 호출 없이 바로 보여줍니다."
+    )
+    
+    metrics = get_metrics()
+    
+    def toggle_metrics():
+        # 체크박스를 직접 바꾼 경우에만 서버 전체 설정을 바꿈 (다른 세션의 rerun은 덮어쓰지 않음)
+        metrics.enabled = st.session_state.metrics_enabled
+        # 계측을 켠 세션에는 디버그 패널도 바로 표시
+        st.session_state.show_debug_panel = metrics.enabled
+    
+    # 다른 세션에서 바꾼 설정도 체크 상태에 반영
+    st.session_state.metrics_enabled = metrics.enabled
+    st.sidebar.checkbox(
+        "성능 계측",
+        key="metrics_enabled",
+        on_change=toggle_metrics,
+        help="검색 단계별 시간과 API 응답 시간을 기록합니다. (서버 전체에 적용)"
+    )
+    # 계측은 서버 전체에서 공유하지만 디버그 패널과 내보내기는 세션마다 선택
+    if metrics.enabled:
+        st.sidebar.checkbox(
+            "디버그 패널 표시",
+            key="show_debug_panel",
+            help="이 세션에서만 단계별 시간과 API 응답 시간, Prometheus 내보내기를 표시합니다."
+        )
+    
+    response_cache = get_response_cache()
+    cache_stats = response_cache.stats()
+    st.sidebar.caption(
+        f"💾 API 캐시: {cache_stats['entries']}건 저장 · "
+        f"적중 {sum(cache_stats['hits'].values())}회 / 미스 {sum(cache_stats['misses'].values())}회"
+    )
+    
+    coalesced = sum(get_single_flight().stats()['coalesced'].values())
+    if coalesced:
+        st.sidebar.caption(f"🔗 다른 세션과 합쳐진 동시 요청: {coalesced}회")
+    
+    # 종료된 세션에서 아직 진행 중인 검색은 남은 호출을 취소
+    job_registry = get_job_registry()
+    session_id = get_script_run_ctx().session_id
+    job_registry.cancel_inactive(is_session_active)
+    if job_registry.cancelled:
+        st.sidebar.caption(f"⏹️ 새 검색/세션 종료로 중단한 검색: {job_registry.cancelled}회")
+    
+    rate_limiter = get_rate_limiter()
+    st.sidebar.caption(
+        f"📊 오늘 남은 할당량: 네이버 {rate_limiter.remaining('naver'):,}회 · "
+        f"카카오 {rate_limiter.remaining('kakao'):,}회"
+    )
+    
     # 메인 검색 폼
     col1, col2, col3 = st.columns(3)
     
@@ -336,7 +584,16 @@ naver_client_secret = "여기에_네이버_시크릿"
                                ["떡집", "과일가게", "김치가게", "빵집", "한과집", "전통시장"])
     
     with col3:
-        product = st.text_input("🛍️ 찾는 상품", value="시루떡", placeholder="예: 시루떡, 사과, 배추김치")
+        product = st.text_input(
+            "🛍️ 찾는 상품",
+            value="시루떡",
+            placeholder="예: 시루떡, 사과, 배추김치",
+            help="쉼표로 여러 상품을 입력하면 가게마다 한 번의 블로그 검색으로 모든 상품을 함께 확인합니다."
+        )
+    
+    # 여러 상품 입력 시 상품 목록으로 검색
+    products = [p.strip() for p in product.split(',') if p.strip()]
+    product_query = products if len(products) > 1 else product
     
     # 검색 버튼
     search_clicked = st.button("🔍 검색하기", type="primary", use_container_width=True)
@@ -351,11 +608,48 @@ naver_client_secret = "여기에_네이버_시크릿"
         """)
         return
     
+    # 인기 검색 미리 준비 (서버 키가 있을 때 프로세스당 한 번 시작)
+    prefetcher = get_prefetcher()
+    result_index = get_result_index()
+    if prefetcher is not None and prefetcher.queries:
+        st.sidebar.caption(
+            f"🗂️ 미리 준비된 검색: {len(result_index)}/{len(prefetcher.queries)}개"
+            + (f" · 마지막 갱신 확인 {prefetcher.last_run:%H:%M}" if prefetcher.last_run else "")
+        )
+    
     # 세션 상태 초기화
     if 'search_results' not in st.session_state:
         st.session_state.search_results = None
     if 'search_params' not in st.session_state:
         st.session_state.search_params = None
+    # 단계별 원본: (위치, 카테고리)별 장소 목록, (가게, 상품)별 블로그 응답
+    if 'place_store' not in st.session_state:
+        st.session_state.place_store = StageStore(PLACE_STAGE_ENTRIES)
+    if 'blog_store' not in st.session_state:
+        st.session_state.blog_store = StageStore(BLOG_STAGE_ENTRIES)
+    # 지도 영역 검색으로 찾은 장소와 검색을 마친 타일 (카테고리별)
+    if 'spatial_indexes' not in st.session_state:
+        st.session_state.spatial_indexes = {}
+    
+    def create_live_finder(cancel_event=None):
+        """이번 실행의 설정으로 API를 호출하는 finder (cancel_event는 SearchJob의 취소 신호)"""
+        finder = LocalProductFinder(
+            cache=response_cache,
+            http=get_http_client(),
+            hedge=hedge_requests,
+            rate_limiter=rate_limiter,
+            single_flight=get_single_flight(),
+            metrics=metrics,
+            on_error=st.error,
+            scoring=scoring,
+            place_store=st.session_state.place_store,
+            blog_store=st.session_state.blog_store,
+            adaptive=adaptive_evidence,
+            text_matching=text_matching,
+            cancel_event=cancel_event
+        )
+        finder.setup_apis(kakao_api_key, naver_client_id, naver_client_secret)
+        return finder
     
     # 검색 실행
     if search_clicked and location and product:
@@ -365,99 +659,272 @@ naver_client_secret = "여기에_네이버_시크릿"
         # 새로운 검색인지 확인
         if st.session_state.search_params != current_params:
             st.session_state.search_params = current_params
+            st.session_state.viewport_bounds = None
+            st.session_state.map_view = None
             # 검색 조건들도 세션에 저장
             st.session_state.last_location = location
             st.session_state.last_category = category
             st.session_state.last_product = product
             
-            finder = LocalProductFinder()
-            finder.setup_apis(kakao_api_key, naver_client_id, naver_client_secret)
+            # 미리 준비된 결과가 있으면 API 호출 없이 사용
+            indexed = None
+            if (use_prefetched and len(products) == 1 and scoring == DEFAULT_SCORING
+                    and not adaptive_evidence and not text_matching):
+                indexed = result_index.get(location, category, product)
             
-            with st.spinner("🔍 주변 가게를 검색하고 있습니다..."):
-                # 1단계: 장소 검색
-                places = finder.search_places_kakao(location, category)
+            if indexed is not None:
+                indexed_places, refreshed_at = indexed
+                places_with_confidence = sorted(
+                    indexed_places[:max_places], key=lambda x: x['confidence'], reverse=True
+                )
+                st.session_state.search_results = compact_results(places_with_confidence)
+                st.session_state.search_fingerprint = result_fingerprint(st.session_state.search_results)
+                st.session_state.search_refreshed_at = refreshed_at
+                st.session_state.search_product_query = product_query
+                st.session_state.search_scoring = DEFAULT_SCORING
+                st.session_state.search_text_matching = False
+                st.success(f"📍 {len(places_with_confidence)}개의 {category}을(를) 찾았습니다!")
+            else:
+                st.session_state.search_refreshed_at = None
+                # 같은 세션의 이전 검색은 취소되고, 이번 검색이 중단되면 남은 호출을 취소
+                with job_registry.run(session_id) as job:
+                    st.session_state.search_job_id = job.job_id
+                    finder = create_live_finder(job.cancel_event)
+                    phases_before = metrics.phase_totals()
                 
-                if not places:
-                    st.error("검색 결과가 없습니다. 위치나 카테고리를 다시 확인해주세요.")
-                    st.session_state.search_results = None
-                    return
+                    with st.spinner("🔍 주변 가게를 검색하고 있습니다..."):
+                        # 1단계: 장소 검색 (첫 페이지가 오면 바로 검증 시작, 나머지 페이지는 검증과 함께 로드)
+                        place_iter = finder.iter_places_kakao(location, category, max_results=max_places)
+                        first_place = next(place_iter, None)
+                    
+                        if first_place is None:
+                            st.error("검색 결과가 없습니다. 위치나 카테고리를 다시 확인해주세요.")
+                            st.session_state.search_results = None
+                            return
+                    
+                        places = itertools.chain([first_place], place_iter)
+                    
+                        # 남은 네이버 할당량이 부족하면 가까운 가게부터 확인하고 나머지는 보류
+                        deferred_places = []
+                        naver_budget = rate_limiter.remaining("naver")
+                        calls_per_place = -(-ADAPTIVE_ITEM_BUDGET // ADAPTIVE_PAGE_SIZE) if adaptive_evidence else 1
+                        if naver_budget is not None and naver_budget < max_places * calls_per_place:
+                            places, deferred_places = finder.rank_for_budget(list(places), naver_budget // calls_per_place)
                 
-                st.success(f"📍 {len(places)}개의 {category}을(를) 찾았습니다!")
-            
-            # 2단계: 블로그 검색 및 신뢰도 계산
-            progress_container = st.container()
-            with progress_container:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+                    if deferred_places:
+                        st.warning(
+                            f"⚠️ 오늘 남은 네이버 API 할당량이 {naver_budget:,}회뿐이라 가까운 가게 {len(places)}곳만 확인합니다. "
+                            f"({len(deferred_places)}곳은 확인 보류)"
+                        )
                 
-                places_with_confidence = []
+                    found_text = st.empty()
                 
-                for i, place in enumerate(places):
-                    status_text.text(f"📝 {place['place_name']}의 {product} 판매 정보를 확인 중... ({i+1}/{len(places)})")
+                    # 2단계: 블로그 검색 및 신뢰도 계산
+                    progress_container = st.container()
+                    with progress_container:
+                        progress_bar = st.progress(0)
+                        status_text = st.empty()
                     
-                    # 블로그 검색
-                    blog_data = finder.search_blogs_naver(place['place_name'], product)
-                    time.sleep(0.1)  # API 호출 제한 방지
+                        status_text.text(f"📝 {category}의 {product} 판매 정보를 확인 중...")
                     
-                    # 신뢰도 계산
-                    confidence, status = finder.calculate_confidence(
-                        blog_data, place['place_name'], product
-                    )
+                        # 실시간 상위 결과 (힙으로 갱신, 최대 0.5초마다 다시 그림)
+                        live_placeholder = st.empty()
+                        ranking = TopKRanking(top_k)
+                        verified_so_far = []
+                        last_render = 0.0
                     
-                    place['confidence'] = confidence
-                    place['status'] = status
-                    place['blog_count'] = len(blog_data.get('items', []))
+                        def update_progress(done, total, index, place):
+                            nonlocal last_render
+                            total_text = total if total is not None else "?"
+                            status_text.text(f"📝 {place['place_name']}의 {product} 판매 정보 확인 완료 ({done}/{total_text})")
+                            progress_bar.progress(min(done / (total or max_places), 1.0))
+                        
+                            # 조기 종료 판단에 쓰이므로 점진 표시를 끄더라도 순위는 갱신
+                            ranking.push(index, place)
+                            if not progressive:
+                                return
+                            verified_so_far.append(place)
+                            if time.monotonic() - last_render >= 0.5 or done == total:
+                                render_live_results(live_placeholder, ranking, verified_so_far, product, scoring)
+                                last_render = time.monotonic()
                     
-                    places_with_confidence.append(place)
-                    progress_bar.progress((i + 1) / len(places))
-                
-                # 신뢰도순 정렬
-                places_with_confidence.sort(key=lambda x: x['confidence'], reverse=True)
+                        def top_k_settled():
+                            return early_stop and ranking.is_settled(scoring.max_confidence)
+                    
+                        # 작업 스레드에서도 st.error 등이 현재 세션에 표시되도록 컨텍스트 전달
+                        script_ctx = get_script_run_ctx()
+                    
+                        def attach_script_ctx():
+                            add_script_run_ctx(threading.current_thread(), script_ctx)
+                    
+                        # 블로그 검색 + 신뢰도 계산
+                        places_with_confidence = finder.verify_places(
+                            places, product_query,
+                            max_workers=max_workers,
+                            on_progress=update_progress,
+                            thread_initializer=attach_script_ctx,
+                            should_stop=top_k_settled
+                        )
+                        live_placeholder.empty()
+                    
+                        places_with_confidence.extend(deferred_places)
+                        found_text.success(f"📍 {len(places_with_confidence)}개의 {category}을(를) 찾았습니다!")
+                    
+                        # 신뢰도순 정렬
+                        places_with_confidence.sort(key=lambda x: x['confidence'], reverse=True)
+                    
+                        # 검색 결과를 슬롯 레코드로 줄여 세션 상태에 저장
+                        st.session_state.search_results = compact_results(places_with_confidence)
+                        st.session_state.search_fingerprint = result_fingerprint(st.session_state.search_results)
+                        st.session_state.search_product_query = product_query
+                        st.session_state.search_scoring = scoring
+                        st.session_state.search_text_matching = text_matching
+                        # 디버그 패널은 이 시점 이후의 단계별 시간을 마지막 검색으로 표시
+                        st.session_state.search_phase_baseline = phases_before
+                    
+                        # 진행률 표시 정리
+                        progress_bar.empty()
+                        status_text.success(f"✅ 검색 완료! {len(places_with_confidence)}개 가게의 {product} 판매 정보를 확인했습니다.")
+        
+    # 지도를 옮겼으면 보이는 영역의 가게로 결과를 바꿈 (처음 보는 타일만 장소 검색)
+    pending_viewport = st.session_state.pop('pending_viewport', None)
+    if viewport_search and pending_viewport is not None and st.session_state.search_results is not None:
+        bounds, zoom = pending_viewport
+        south, west, north, east = bounds
+        st.session_state.viewport_bounds = bounds
+        st.session_state.map_view = ((south + north) / 2, (west + east) / 2, zoom)
+        
+        if viewport_too_large(bounds):
+            st.info("🔍 보이는 영역이 너무 넓습니다. 지도를 확대하면 보이는 영역의 가게를 찾습니다.")
+        else:
+            search_category = st.session_state.get('last_category', category)
+            search_product = st.session_state.get('search_product_query', product_query)
+            index = st.session_state.spatial_indexes.setdefault(search_category, SpatialIndex())
+            with job_registry.run(session_id) as job:
+                st.session_state.search_job_id = job.job_id
+                finder = create_live_finder(job.cancel_event)
+            
+                with st.spinner("🗺️ 지도에 보이는 영역의 가게를 찾고 있습니다..."):
+                    places, skipped_tiles = finder.search_viewport(
+                        search_category, bounds, index, max_results=max_places, max_workers=max_workers
+                    )
                 
-                # 검색 결과를 세션 상태에 저장
-                st.session_state.search_results = places_with_confidence
+                    deferred_places = []
+                    naver_budget = rate_limiter.remaining("naver")
+                    calls_per_place = -(-ADAPTIVE_ITEM_BUDGET // ADAPTIVE_PAGE_SIZE) if adaptive_evidence else 1
+                    if naver_budget is not None and naver_budget < len(places) * calls_per_place:
+                        places, deferred_places = finder.rank_for_budget(places, naver_budget // calls_per_place)
                 
-                # 진행률 표시 정리
-                progress_bar.empty()
-                status_text.success(f"✅ 검색 완료! {len(places_with_confidence)}개 가게의 {product} 판매 정보를 확인했습니다.")
-        
+                    verified = finder.verify_places(places, search_product, max_workers=max_workers)
+                    verified.extend(deferred_places)
+            
+            if skipped_tiles:
+                st.info(f"🗺️ 보이는 영역이 넓어 {skipped_tiles}개 타일은 아직 찾지 않았습니다. 지도를 확대하거나 다시 움직이면 이어서 찾습니다.")
+            
+            if verified:
+                verified.sort(key=lambda x: x['confidence'], reverse=True)
+                st.session_state.search_results = compact_results(verified)
+                st.session_state.search_fingerprint = result_fingerprint(st.session_state.search_results)
+                st.session_state.search_product_query = search_product
+                st.session_state.search_refreshed_at = None
+                st.session_state.search_scoring = scoring
+                st.session_state.search_text_matching = text_matching
+            else:
+                st.info("🗺️ 지도에 보이는 영역에서 찾은 가게가 없습니다.")
+    
+    # 신뢰도 설정/언급 인정 방식만 바뀌었으면 저장된 블로그 응답으로 다시 계산
+    # (세션에서 밀려난 응답만 다시 불러오며, 응답 캐시에 있으면 API 호출 없음)
+    if (st.session_state.search_results is not None
+            and (st.session_state.get('search_scoring', DEFAULT_SCORING) != scoring
+                 or st.session_state.get('search_text_matching', False) != text_matching)):
+        if st.session_state.get('search_refreshed_at') is None:
+            with job_registry.run(session_id) as job:
+                st.session_state.search_job_id = job.job_id
+                rescorer = create_live_finder(job.cancel_event)
+                rescored, stale = rescorer.rescore(
+                    st.session_state.search_results, st.session_state.search_product_query, max_workers=max_workers
+                )
+            if stale:
+                st.warning(f"⚠️ {len(stale)}개 가게는 블로그 응답을 다시 받지 못해 이전 설정의 신뢰도로 표시됩니다.")
+            rescored.sort(key=lambda x: x.confidence, reverse=True)
+            st.session_state.search_results = rescored
+            st.session_state.search_fingerprint = result_fingerprint(rescored)
+            st.session_state.search_scoring = scoring
+            st.session_state.search_text_matching = text_matching
+        else:
+            st.info("미리 준비된 결과는 기본 설정으로 계산되었습니다. 다시 검색하면 새 설정이 적용됩니다.")
+            st.session_state.search_params = None
+    
     # 검색 결과 표시 (세션 상태에서 가져옴)
     if st.session_state.search_results is not None:
         places_with_confidence = st.session_state.search_results
         
-        # finder 객체 초기화 (결과 표시용)
-        finder = LocalProductFinder()
-        finder.setup_apis(kakao_api_key, naver_client_id, naver_client_secret)
+        # 결과 표시용 finder와 파생 데이터 (결과가 같으면 rerun마다 다시 계산하지 않음)
+        finder = get_display_finder()
+        fingerprint = st.session_state.get('search_fingerprint') or result_fingerprint(places_with_confidence)
+        views = build_result_views(fingerprint, scoring, places_with_confidence)
+        
+        refreshed_at = st.session_state.get('search_refreshed_at')
+        if refreshed_at is not None:
+            st.caption(f"🗂️ 미리 준비된 결과입니다 ({refreshed_at:%Y-%m-%d %H:%M} 기준)")
         
         # 결과 표시
         st.markdown(f"## 🎯 '{product}' 검색 결과")
         
         # 요약 정보
-        high_conf = len([p for p in places_with_confidence if p['confidence'] >= 0.7])
-        medium_conf = len([p for p in places_with_confidence if p['confidence'] >= 0.4])
-        
         col_summary1, col_summary2, col_summary3 = st.columns(3)
         with col_summary1:
-            st.metric("총 가게 수", len(places_with_confidence))
+            st.metric("총 가게 수", views['total'])
         with col_summary2:
-            st.metric("판매 확실", f"{high_conf}개", delta="높은 신뢰도")
+            st.metric("판매 확실", f"{views['high']}개", delta="높은 신뢰도")
         with col_summary3:
-            st.metric("판매 가능", f"{medium_conf}개", delta="보통 이상 신뢰도")
+            st.metric("판매 가능", f"{views['medium']}개", delta="보통 이상 신뢰도")
         
         # 탭으로 구분하여 표시
         tab1, tab2, tab3 = st.tabs(["🗺️ 지도 보기", "📋 상세 결과", "📊 데이터 표"])
         
         with tab1:
             st.markdown("### 📍 지도에서 보기")
-            # 중심점 계산 (첫 번째 결과 기준)
+            # 중심점 계산 (첫 번째 결과 기준, 지도 영역 검색 중이면 마지막으로 본 영역 유지)
             if places_with_confidence:
-                center_lat = float(places_with_confidence[0]['y'])
-                center_lng = float(places_with_confidence[0]['x'])
+                map_view = st.session_state.get('map_view') if viewport_search else None
+                if map_view is not None:
+                    center_lat, center_lng, map_zoom = map_view
+                else:
+                    center_lat = places_with_confidence[0].y
+                    center_lng = places_with_confidence[0].x
+                    map_zoom = None
+                
+                # 결과가 바뀌지 않은 rerun에서는 저장해 둔 지도를 그대로 사용
+                # (지도 영역 검색은 움직인 영역을 받아야 하므로 개별 마커 지도 사용)
+                clustered = not viewport_search and (map_mode == "클러스터" or (
+                    map_mode == "자동" and len(places_with_confidence) > CLUSTER_MARKER_THRESHOLD
+                ))
                 
-                # finder 객체가 있는지 확인
                 try:
-                    map_obj = finder.create_map(places_with_confidence, center_lat, center_lng)
-                    st_folium(map_obj, width=700, height=500, returned_objects=["last_object_clicked"])
+                    if clustered:
+                        map_html = get_cluster_map_html(fingerprint, scoring, finder, places_with_confidence, center_lat, center_lng)
+                        components.html(map_html, width=700, height=500)
+                    else:
+                        from streamlit_folium import st_folium
+                        
+                        map_obj = get_result_map(fingerprint, scoring, finder, places_with_confidence, center_lat, center_lng)
+                        if viewport_search:
+                            map_state = st_folium(
+                                map_obj, width=700, height=500, key="viewport_map",
+                                returned_objects=["bounds", "zoom"],
+                                center=(center_lat, center_lng), zoom=map_zoom
+                            )
+                            bounds = viewport_from_map_state(map_state)
+                            if bounds is not None and bounds != st.session_state.get('viewport_bounds'):
+                                if st.session_state.get('viewport_bounds') is None:
+                                    # 검색 직후 처음 받은 영역은 기준으로만 기록
+                                    st.session_state.viewport_bounds = bounds
+                                else:
+                                    st.session_state.pending_viewport = (bounds, map_state.get('zoom'))
+                                    st.rerun()
+                        else:
+                            st_folium(map_obj, width=700, height=500, returned_objects=["last_object_clicked"])
                 except Exception as e:
                     st.error(f"지도를 생성하는 중 오류가 발생했습니다: {str(e)}")
                     # 대체 지도 표시
@@ -469,74 +936,50 @@ naver_client_secret = "여기에_네이버_시크릿"
             # 신뢰도별 필터링
             filter_confidence = st.selectbox(
                 "신뢰도 필터링",
-                ["전체", "높음 (70% 이상)", "보통 (40% 이상)", "낮음 (40% 미만)"],
+                confidence_filters(scoring),
                 key="confidence_filter"
             )
             
-            # 필터링 적용
-            filtered_places = places_with_confidence
-            if filter_confidence == "높음 (70% 이상)":
-                filtered_places = [p for p in places_with_confidence if p['confidence'] >= 0.7]
-            elif filter_confidence == "보통 (40% 이상)":
-                filtered_places = [p for p in places_with_confidence if p['confidence'] >= 0.4]
-            elif filter_confidence == "낮음 (40% 미만)":
-                filtered_places = [p for p in places_with_confidence if p['confidence'] < 0.4]
+            # 필터링 적용 (미리 계산된 인덱스 사용)
+            filtered_places = [places_with_confidence[i] for i in views['filtered'][filter_confidence]]
             
             if not filtered_places:
                 st.info("선택한 조건에 맞는 결과가 없습니다.")
             else:
                 for i, place in enumerate(filtered_places):
-                    confidence = place['confidence']
+                    confidence = place.confidence
                     
                     # 신뢰도에 따른 스타일 클래스
-                    if confidence >= 0.7:
-                        confidence_class = "confidence-high"
-                    elif confidence >= 0.4:
-                        confidence_class = "confidence-medium"
-                    else:
-                        confidence_class = "confidence-low"
+                    confidence_class = CONFIDENCE_CLASSES[scoring.level(confidence)]
                     
                     with st.container():
                         st.markdown(f"""
                         <div class="store-card">
-                            <div class="store-name">{i+1}. {place['place_name']}</div>
-                            <div class="store-info">📍 {place['address_name']}</div>
+                            <div class="store-name">{i+1}. {place.place_name}</div>
+                            <div class="store-info">📍 {place.address_name}</div>
                             <div class="store-info">📞 {place.get('phone', '전화번호 정보 없음')}</div>
-                            <div class="store-info">📝 블로그 언급 {place['blog_count']}회</div>
+                            <div class="store-info">📝 블로그 언급 {place.blog_count}회</div>
                             <span class="{confidence_class}">신뢰도 {confidence:.1%}</span>
-                            <div class="store-info" style="margin-top: 0.5rem;">{place['status']}</div>
+                            <div class="store-info" style="margin-top: 0.5rem;">{place.status}</div>
                         </div>
                         """, unsafe_allow_html=True)
                         
                         # 가게별 추가 정보 (expander)
-                        with st.expander(f"{place['place_name']} 더보기"):
+                        with st.expander(f"{place.place_name} 더보기"):
                             col1, col2 = st.columns(2)
                             with col1:
                                 st.write(f"**카테고리:** {place.get('category_name', '정보없음')}")
                                 st.write(f"**도로명주소:** {place.get('road_address_name', '정보없음')}")
                             with col2:
                                 st.write(f"**거리:** {place.get('distance', '정보없음')}m")
-                                if place.get('place_url'):
-                                    st.write(f"**상세정보:** [카카오맵에서 보기]({place['place_url']})")
+                                if place.place_url:
+                                    st.write(f"**상세정보:** [카카오맵에서 보기]({place.place_url})")
                                     
         with tab3:
             st.markdown("### 📊 상세 데이터")
             # 결과 데이터프레임
-            df = pd.DataFrame([
-                {
-                    '순위': i + 1,
-                    '가게명': place['place_name'],
-                    '주소': place['address_name'],
-                    '전화번호': place.get('phone', '정보없음'),
-                    '블로그 언급': f"{place['blog_count']}회",
-                    '신뢰도': f"{place['confidence']:.1%}",
-                    '상태': place['status'].replace('✅', '').replace('⚠️', '').replace('❓', '').strip()
-                }
-                for i, place in enumerate(places_with_confidence)
-            ])
-            
             st.dataframe(
-                df,
+                views['dataframe'],
                 use_container_width=True,
                 hide_index=True,
                 column_config={
@@ -550,11 +993,23 @@ naver_client_secret = "여기에_네이버_시크릿"
                 }
             )
             
+            # 여러 상품 검색: 가게 × 상품 신뢰도 행렬
+            if views['matrix'] is not None:
+                st.markdown("### 🧮 상품별 신뢰도")
+                st.dataframe(
+                    views['matrix'],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        column: st.column_config.ProgressColumn(min_value=0, max_value=1, format="%.2f")
+                        for column in views['matrix'].columns if column != '가게명'
+                    }
+                )
+            
             # CSV 다운로드
-            csv = df.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
                 label="📥 결과를 CSV로 다운로드",
-                data=csv,
+                data=views['csv'],
                 file_name=f"{st.session_state.get('last_location', 'unknown')}_{st.session_state.get('last_category', 'unknown')}_{st.session_state.get('last_product', 'unknown')}_검색결과_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 key="download_csv"
@@ -562,6 +1017,15 @@ naver_client_secret = "여기에_네이버_시크릿"
     
     elif search_clicked:
         st.info("검색 조건을 확인해주세요.")
+    
+    # 검색과 지도/표 생성이 끝난 뒤에 그려야 이번 실행의 계측값이 반영됨
+    if metrics.enabled and st.session_state.get('show_debug_panel'):
+        render_debug_panel(metrics)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except SearchCancelled:
+        # 같은 세션에서 새 검색이 시작되어 이전 검색이 중단됨 - 같은 조건으로 다시 검색할 수 있게 함
+        st.session_state.search_params = None
+        st.info("🔄 이전 검색이 취소되었습니다. 다시 검색하면 이미 받은 응답을 재사용해 이어서 확인합니다.")
\ No newline at end of file